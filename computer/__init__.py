@@ -1 +1,18 @@
-from .computer import Computer, parse_program, RunResult
+from .computer import (
+    Computer,
+    parse_program,
+    load_program,
+    encode_ascii,
+    decode_ascii,
+    RunResult,
+    Snapshot,
+)
+from .image import ProgramImage
+from .compiler import CompiledComputer
+from .tracing import Tracer, LoggingTracer
+from .profiler import Profiler
+from .scheduler import Scheduler
+from .parallel import sweep
+from .cache import ResultCache
+from .specialize import Specializer, specialize
+from .pool import ComputerPool
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Optional
+
+from .computer import Computer, RunResult
+
+# instructions a computer runs before yielding to the event loop
+DEFAULT_SLICE = 1000
+
+
+def channel() -> "asyncio.Queue[int]":
+    """An unbounded channel of values between computers."""
+    return asyncio.Queue()
+
+
+async def run_async(
+    computer: Computer,
+    inbox: "asyncio.Queue[int]",
+    outbox: "asyncio.Queue[int]",
+    slice_size: int = DEFAULT_SLICE,
+):
+    """
+    Runs computer as a coroutine until it halts, reading its input from inbox
+    and writing its output to outbox. Any values already in the computer's
+    input queue are read first.
+
+    The computer awaits the inbox when it needs input that isn't there yet,
+    so an idle computer costs nothing, and yields to the event loop after
+    every slice_size instructions so a busy one can't starve the others.
+
+    Computers are wired together by sharing channels, e.g. the outbox of one
+    amplifier is the inbox of the next.
+    """
+
+    def next_input() -> Optional[int]:
+        return None if inbox.empty() else inbox.get_nowait()
+
+    input_fn, output_fn = computer.input_fn, computer.output_fn
+    computer.input_fn = next_input
+    computer.output_fn = outbox.put_nowait
+    try:
+        while True:
+            outputs, result = computer.run(
+                until_blocked=True, max_instructions=slice_size
+            )
+            if result == RunResult.HALTED:
+                return
+            if result == RunResult.BLOCK_ON_INPUT:
+                computer.add_input(await inbox.get())
+            else:
+                await asyncio.sleep(0)
+    finally:
+        computer.input_fn, computer.output_fn = input_fn, output_fn
@@ -0,0 +1,248 @@
+from typing import Dict, List, NamedTuple, Set, Tuple
+import sys
+
+from .computer import (
+    OP_NAMES,
+    WRITE_PARAMS,
+    Computer,
+    Instruction,
+    ParamMode,
+    parse_program,
+)
+
+
+def format_param(mode: ParamMode, param: int) -> str:
+    if mode == ParamMode.IMMEDIATE:
+        return str(param)
+    if mode == ParamMode.POSITION:
+        return f"[{param}]"
+    return f"[rb{param:+d}]"
+
+
+def format_instruction(pos: int, instruction: Instruction) -> str:
+    """e.g. "   12: ADD [13], 1 -> [13]" """
+    params = [
+        format_param(mode, param)
+        for mode, param in zip(instruction.param_modes, instruction.params)
+    ]
+    if instruction.opcode in WRITE_PARAMS:
+        target = params.pop(WRITE_PARAMS[instruction.opcode] - 1)
+        args = ", ".join(params) + (" -> " if params else "-> ") + target
+    else:
+        args = ", ".join(params)
+    return f"{pos:>5}: {OP_NAMES[instruction.opcode]} {args}".rstrip()
+
+
+class BasicBlock(NamedTuple):
+    start: int
+    # one past the last cell of the block's last instruction
+    end: int
+    instructions: List[Tuple[int, Instruction]]
+    # start addresses of the blocks which can run next
+    successors: List[int]
+
+
+class Analysis:
+    """
+    Static analysis of an Intcode program, as it is before it runs.
+
+    Code is found by following every path from address 0. Jumps to a target
+    held in memory (rather than an immediate) can't be followed, and writes
+    in relative mode can't be pinned to an address. Nor can an instruction
+    whose opcode, write target or jump operands are themselves written to,
+    as it may not run as decoded. When a program has any of those the code
+    found is only as good as the static view allows, no cells are known to
+    be read-only, and the report says so.
+    """
+
+    def __init__(self, program: List[int]):
+        self.program = program
+        # every instruction reachable from the start, keyed by address
+        self.instructions: Dict[int, Instruction] = {}
+        # addresses of instructions which don't decode, but are jumped to or
+        # fallen through to
+        self.invalid: Set[int] = set()
+        # addresses of jumps whose target can't be known statically
+        self.indirect_jumps: List[int] = []
+        # addresses of writes whose target can't be known statically
+        self.dynamic_writes: List[int] = []
+        # address of each write with a constant target -> the target
+        self.writes: Dict[int, int] = {}
+        # addresses where a block starts: the start, and every jump target
+        self.leaders = {0}
+        self.blocks: Dict[int, BasicBlock] = {}
+
+        self.find_code()
+        self.find_writes()
+        self.build_cfg()
+
+    def find_code(self):
+        decoder = Computer(self.program)
+        queue = [0]
+        while queue:
+            pos = queue.pop()
+            if pos in self.instructions or pos in self.invalid:
+                continue
+            if pos < 0 or pos >= len(self.program):
+                self.invalid.add(pos)
+                continue
+            try:
+                instruction = decoder.decode(pos)
+            except ValueError:
+                self.invalid.add(pos)
+                continue
+
+            self.instructions[pos] = instruction
+            successors = self.successors(pos, instruction)
+            if instruction.opcode in (5, 6):
+                self.leaders.update(successors)
+                if instruction.param_modes[1] != ParamMode.IMMEDIATE:
+                    self.indirect_jumps.append(pos)
+            queue.extend(successors)
+
+    def successors(self, pos: int, instruction: Instruction) -> List[int]:
+        """Addresses which can run next, leaving out indirect jump targets."""
+        op = instruction.opcode
+        next_pos = pos + instruction.length
+        if op == 99:
+            return []
+        if op not in (5, 6):
+            return [next_pos]
+
+        (test_mode, target_mode), (test, target) = (
+            instruction.param_modes,
+            instruction.params,
+        )
+        taken = [target] if target_mode == ParamMode.IMMEDIATE else []
+        if test_mode == ParamMode.IMMEDIATE:
+            # the jump is either always or never taken
+            return taken if (test != 0) == (op == 5) else [next_pos]
+        return taken + [next_pos]
+
+    def find_writes(self):
+        for pos, instruction in self.instructions.items():
+            if instruction.opcode not in WRITE_PARAMS:
+                continue
+            n = WRITE_PARAMS[instruction.opcode] - 1
+            mode, param = instruction.param_modes[n], instruction.params[n]
+            if mode == ParamMode.POSITION:
+                self.writes[pos] = param
+            elif mode == ParamMode.RELATIVE:
+                self.dynamic_writes.append(pos)
+
+        # An instruction whose opcode, write target or jump operands are
+        # written to can end up writing or jumping anywhere, so isn't known
+        # statically either.
+        written = set(self.writes.values())
+        for pos, instruction in sorted(self.instructions.items()):
+            op = instruction.opcode
+            replaced = pos in written
+            if replaced or (op in WRITE_PARAMS and pos + WRITE_PARAMS[op] in written):
+                if pos not in self.dynamic_writes:
+                    self.dynamic_writes.append(pos)
+            if replaced or (op in (5, 6) and {pos + 1, pos + 2} & written):
+                if pos not in self.indirect_jumps:
+                    self.indirect_jumps.append(pos)
+
+    def build_cfg(self):
+        for start in sorted(self.leaders & self.instructions.keys()):
+            instructions = []
+            pos = start
+            while True:
+                instruction = self.instructions[pos]
+                instructions.append((pos, instruction))
+                successors = self.successors(pos, instruction)
+                pos += instruction.length
+                if (
+                    instruction.opcode in (5, 6, 99)
+                    or pos in self.leaders
+                    or pos not in self.instructions
+                ):
+                    break
+            self.blocks[start] = BasicBlock(start, pos, instructions, successors)
+
+    @property
+    def code_cells(self) -> Set[int]:
+        """Every cell of every reachable instruction."""
+        return {
+            addr
+            for pos, instruction in self.instructions.items()
+            for addr in range(pos, pos + instruction.length)
+        }
+
+    @property
+    def self_modifying_writes(self) -> Dict[int, int]:
+        """Writes with a constant target in code: address -> target."""
+        code = self.code_cells
+        return {pos: target for pos, target in self.writes.items() if target in code}
+
+    @property
+    def is_self_modifying(self) -> bool:
+        """True unless the program is known never to write into its code."""
+        return bool(
+            self.self_modifying_writes or self.dynamic_writes or self.indirect_jumps
+        )
+
+    def read_only_regions(self) -> List[Tuple[int, int]]:
+        """
+        Ranges [start, end) of code which no write can target. Empty if the
+        program has any write whose target isn't known, which could target
+        anything, or any indirect jump, as the code it reaches isn't known.
+        """
+        if self.dynamic_writes or self.indirect_jumps:
+            return []
+        written = set(self.writes.values())
+        cells = sorted(self.code_cells - written)
+        regions: List[Tuple[int, int]] = []
+        for addr in cells:
+            if regions and regions[-1][1] == addr:
+                regions[-1] = (regions[-1][0], addr + 1)
+            else:
+                regions.append((addr, addr + 1))
+        return regions
+
+    def disassemble(self) -> List[str]:
+        """Every reachable instruction, with a blank line between blocks."""
+        lines: List[str] = []
+        for block in self.blocks.values():
+            if lines:
+                lines.append("")
+            for pos, instruction in block.instructions:
+                lines.append(format_instruction(pos, instruction))
+        return lines
+
+    def report(self) -> str:
+        lines = [
+            f"program length: {len(self.program)}",
+            f"reachable instructions: {len(self.instructions)}"
+            + f" in {len(self.blocks)} blocks ({len(self.code_cells)} cells)",
+            f"indirect jumps: {len(self.indirect_jumps)}",
+            f"writes to a constant address: {len(self.writes)}",
+            f"writes to an unknown address: {len(self.dynamic_writes)}",
+        ]
+        modifying = self.self_modifying_writes
+        lines.append(f"writes into code: {len(modifying)}")
+        for pos, target in sorted(modifying.items()):
+            lines.append(f"  {format_instruction(pos, self.instructions[pos])}")
+
+        if self.dynamic_writes:
+            lines.append("read-only code: unknown, dynamic writes can target anything")
+        elif self.indirect_jumps:
+            lines.append("read-only code: unknown, indirect jumps reach unscanned code")
+        else:
+            regions = self.read_only_regions()
+            cells = sum(end - start for start, end in regions)
+            lines.append(f"read-only code: {cells} cells in {len(regions)} regions")
+        if self.indirect_jumps:
+            lines.append("(code reached only through indirect jumps is not included)")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # report on each program file given
+    for path in sys.argv[1:]:
+        with open(path) as f:
+            analysis = Analysis(parse_program(f.read().strip()))
+        print(f"{path}:")
+        print(analysis.report())
+        print()
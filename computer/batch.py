@@ -0,0 +1,199 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from .computer import NUM_PARAMS, ParamMode, RunResult
+
+INT64_MIN = np.iinfo(np.int64).min
+
+# memory after the end of the program, for data the program stores there
+DEFAULT_EXTRA_MEMORY = 1024
+
+
+class BatchComputer:
+    """
+    Runs one program for many sets of inputs at once. Each set is a lane,
+    with its own row of an N x M int64 memory array, pc, relative base and
+    inputs.
+
+    Every step takes the runnable lanes which are at the same pc with the
+    same instruction there, and runs that instruction for all of them with
+    vectorized NumPy operations. Lanes whose control flow diverges are
+    grouped by pc, so they still run together wherever they meet again.
+
+    Lanes stop when they halt, or block when they need more input than they
+    were given. Unlike Computer, memory doesn't grow: it is the program plus
+    extra_memory cells, and accessing outside of it raises IndexError. Values
+    are int64, and OverflowError is raised rather than wrapping around.
+    """
+
+    def __init__(
+        self,
+        program: List[int],
+        inputs: Optional[Sequence[Sequence[int]]] = None,
+        patches: Optional[Dict[int, Sequence[int]]] = None,
+        lanes: Optional[int] = None,
+        extra_memory: int = DEFAULT_EXTRA_MEMORY,
+    ):
+        """
+        inputs holds the inputs of each lane. patches maps an address to the
+        value it holds in each lane, e.g. {1: nouns, 2: verbs}. The number of
+        lanes is taken from these if lanes isn't given.
+        """
+        if lanes is None:
+            if inputs is not None:
+                lanes = len(inputs)
+            elif patches:
+                lanes = len(next(iter(patches.values())))
+            else:
+                raise ValueError("number of lanes is unknown")
+
+        self.lanes = lanes
+        self.memory = np.zeros((lanes, len(program) + extra_memory), dtype=np.int64)
+        self.memory[:, : len(program)] = program
+        for addr, values in (patches or {}).items():
+            self.memory[:, addr] = values
+
+        self.pc = np.zeros(lanes, dtype=np.int64)
+        self.relative_base = np.zeros(lanes, dtype=np.int64)
+        self.status = np.full(lanes, RunResult.RUNNABLE.value, dtype=np.int8)
+
+        # inputs of every lane, padded to the same length
+        inputs = inputs if inputs is not None else [[]] * lanes
+        assert len(inputs) == lanes, "inputs must be given for every lane"
+        self.input_count = np.array([len(i) for i in inputs], dtype=np.int64)
+        self.inputs = np.zeros((lanes, max(self.input_count, default=0)), np.int64)
+        for lane, values in enumerate(inputs):
+            self.inputs[lane, : len(values)] = values
+        self.input_pos = np.zeros(lanes, dtype=np.int64)
+
+        self.outputs: List[List[int]] = [[] for _ in range(lanes)]
+
+        # number of vectorized steps run, and instructions run over all lanes
+        self.steps = 0
+        self.instructions_executed = 0
+
+    def run(self) -> Tuple[List[List[int]], np.ndarray]:
+        """
+        Runs until no lane can make progress. Returns the outputs of each lane
+        and an array of each lane's RunResult value (HALTED or
+        BLOCK_ON_INPUT).
+        """
+        runnable = RunResult.RUNNABLE.value
+        while True:
+            active = np.flatnonzero(self.status == runnable)
+            if not active.size:
+                break
+            for pc, lanes in self.groups(active):
+                self.step(pc, lanes)
+        return self.outputs, self.status
+
+    @property
+    def halted(self) -> np.ndarray:
+        return self.status == RunResult.HALTED.value
+
+    def groups(self, active: np.ndarray):
+        """Yields (pc, lanes) for the lanes about to run the same instruction."""
+        pcs = self.pc[active]
+        words = self.memory[active, pcs]
+        if (pcs == pcs[0]).all() and (words == words[0]).all():
+            # the common case: every lane is in lockstep
+            yield int(pcs[0]), active
+            return
+
+        order = np.lexsort((words, pcs))
+        pcs, words, active = pcs[order], words[order], active[order]
+        splits = np.flatnonzero((pcs[1:] != pcs[:-1]) | (words[1:] != words[:-1]))
+        for group in np.split(np.arange(len(active)), splits + 1):
+            yield int(pcs[group[0]]), active[group]
+
+    def address(self, lanes: np.ndarray, mode: ParamMode, param: np.ndarray):
+        if mode == ParamMode.RELATIVE:
+            param = self.relative_base[lanes] + param
+        if param.min() < 0 or param.max() >= self.memory.shape[1]:
+            raise IndexError(f"address out of range: {param.min()}..{param.max()}")
+        return param
+
+    def step(self, pc: int, lanes: np.ndarray):
+        word = int(self.memory[lanes[0], pc])
+        op = word % 100
+        if op not in NUM_PARAMS:
+            raise ValueError(f"Unknown opcode: {op}")
+        count = NUM_PARAMS[op]
+        modes = [ParamMode((word // 10 ** (n + 2)) % 10) for n in range(count)]
+        params = [self.memory[lanes, pc + n + 1] for n in range(count)]
+
+        def value(n: int) -> np.ndarray:
+            if modes[n] == ParamMode.IMMEDIATE:
+                return params[n]
+            return self.memory[lanes, self.address(lanes, modes[n], params[n])]
+
+        def store(n: int, values: np.ndarray):
+            # writes in immediate mode are ignored, as in Computer
+            if modes[n] != ParamMode.IMMEDIATE:
+                self.memory[lanes, self.address(lanes, modes[n], params[n])] = values
+
+        self.steps += 1
+        next_pc = pc + 1 + count
+
+        if op == 1:
+            store(2, checked_add(value(0), value(1)))
+        elif op == 2:
+            store(2, checked_multiply(value(0), value(1)))
+        elif op == 3:
+            has_input = self.input_pos[lanes] < self.input_count[lanes]
+            blocked = lanes[~has_input]
+            self.status[blocked] = RunResult.BLOCK_ON_INPUT.value
+            lanes = lanes[has_input]
+            if lanes.size:
+                params = [p[has_input] for p in params]
+                store(0, self.inputs[lanes, self.input_pos[lanes]])
+                self.input_pos[lanes] += 1
+        elif op == 4:
+            for lane, v in zip(lanes.tolist(), value(0).tolist()):
+                self.outputs[lane].append(v)
+        elif op == 5 or op == 6:
+            test = value(0)
+            jump = test != 0 if op == 5 else test == 0
+            self.pc[lanes] = next_pc
+            self.instructions_executed += lanes.size
+            if jump.any():
+                # the target is only read for the lanes which jump, as it may
+                # be out of range in the others
+                lanes = lanes[jump]
+                params = [p[jump] for p in params]
+                self.pc[lanes] = value(1)
+            return
+        elif op == 7:
+            store(2, (value(0) < value(1)).astype(np.int64))
+        elif op == 8:
+            store(2, (value(0) == value(1)).astype(np.int64))
+        elif op == 9:
+            self.relative_base[lanes] += value(0)
+        elif op == 99:
+            self.status[lanes] = RunResult.HALTED.value
+            self.instructions_executed += lanes.size
+            return
+
+        self.pc[lanes] = next_pc
+        self.instructions_executed += lanes.size
+
+
+def checked_add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        result = a + b
+    # overflowed if both operands have the other sign to the result
+    if (((a ^ result) & (b ^ result)) < 0).any():
+        raise OverflowError("int64 overflow in add")
+    return result
+
+
+def checked_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore", divide="ignore"):
+        result = a * b
+        nonzero = a != 0
+        wrong = np.zeros_like(nonzero)
+        wrong[nonzero] = result[nonzero] // a[nonzero] != b[nonzero]
+    if wrong.any() or ((a == -1) & (b == INT64_MIN)).any():
+        raise OverflowError("int64 overflow in multiply")
+    return result
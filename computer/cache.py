@@ -0,0 +1,141 @@
+from array import array
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Type, Union
+
+from .computer import Computer, RunResult
+from .files import atomic_write
+from .image import ProgramImage
+
+DEFAULT_MAXSIZE = 128
+
+
+class CachedRun(NamedTuple):
+    outputs: List[int]
+    result: RunResult
+    # memory after the run, if it was asked for
+    memory: Optional[List[int]]
+
+
+def program_hash(program: Union[List[int], ProgramImage]) -> bytes:
+    """
+    The sha256 of the program's cells (and where it starts, for a specialized
+    image). An image keeps its hash, so it is only worked out once.
+    """
+    if isinstance(program, ProgramImage):
+        if program.sha256 is None:
+            program.sha256 = program_hash(program.memory.tolist())
+            if program.pos or program.relative_base:
+                start = f"{program.pos},{program.relative_base}|".encode()
+                program.sha256 = hashlib.sha256(start + program.sha256).digest()
+        return program.sha256
+
+    h = hashlib.sha256()
+    try:
+        h.update(array("q", program).tobytes())
+    except OverflowError:
+        h.update(",".join(map(str, program)).encode())
+    return h.digest()
+
+
+def digest(program: Union[List[int], ProgramImage], inputs: Iterable[int]) -> str:
+    """A hash of the program's cells and the inputs given to it."""
+    h = hashlib.sha256(program_hash(program))
+    h.update(b"|" + ",".join(map(str, inputs)).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Memoizes runs of a program which depend on nothing but the program and
+    its inputs, keyed by a hash of both. Each run keeps its outputs, how it
+    stopped (halted, or blocked for more input than it was given) and
+    optionally its final memory.
+
+    Results are kept in memory, evicting the least recently used past
+    maxsize, and if directory is given also in a file per run under it, so
+    they last between processes.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries: "OrderedDict[str, CachedRun]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def run(
+        self,
+        program: Union[List[int], ProgramImage],
+        inputs: Sequence[int] = (),
+        keep_memory=False,
+        computer_class: Type[Computer] = Computer,
+    ) -> CachedRun:
+        """
+        Runs program with inputs until it halts or blocks on input, or returns
+        the cached result of doing so. The lists in the result are shared with
+        the cache, so don't modify them.
+        """
+        key = digest(program, inputs)
+        cached = self.get(key)
+        if cached is not None and (cached.memory is not None or not keep_memory):
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        c = computer_class(program, inputs=list(inputs))
+        outputs, result = c.run(until_blocked=True)
+        memory = c.memory.tolist() if keep_memory else None
+        cached = CachedRun(outputs, result, memory)
+        self.put(key, cached)
+        return cached
+
+    def get(self, key: str) -> Optional[CachedRun]:
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.entries.move_to_end(key)
+            return cached
+
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(key)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        cached = CachedRun(
+            stored["outputs"], RunResult(stored["result"]), stored["memory"]
+        )
+        self.remember(key, cached)
+        return cached
+
+    def put(self, key: str, cached: CachedRun):
+        self.remember(key, cached)
+        if self.directory is None:
+            return
+
+        stored = {
+            "outputs": cached.outputs,
+            "result": cached.result.value,
+            "memory": cached.memory,
+        }
+        # replaced atomically, so readers never see half a file
+        atomic_write(self.path(key), json.dumps(stored).encode())
+
+    def remember(self, key: str, cached: CachedRun):
+        self.entries[key] = cached
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def path(self, key: str) -> str:
+        assert self.directory is not None
+        return os.path.join(self.directory, key + ".json")
+
+    def clear(self):
+        """Forgets every result kept in memory. Files on disk are kept."""
+        self.entries.clear()
@@ -0,0 +1,206 @@
+from array import array
+from collections import deque
+import struct
+import sys
+from typing import List, Tuple, Type
+import zlib
+
+from .computer import Computer, RunResult
+from .files import atomic_write
+from .memory import PAGE_SIZE, PAGE_TYPECODE, PagedMemory, copy_page
+
+# A checkpoint is the complete state of a Computer in a compact binary form:
+#
+#   header: magic, format version (uint16), flags (uint16, unused), crc32 of
+#           the body (uint32) and length of the body (uint64)
+#   body:   zlib compressed state, see encode_state()
+#
+# Integers in the body are zigzag encoded varints, so that they can be any
+# size, except for int64 pages which are stored as raw little endian int64s.
+MAGIC = b"ICCK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+
+# how each page of memory is stored
+INT64_PAGE = 0
+BIG_INT_PAGE = 1
+INT64_PAGE_BYTES = PAGE_SIZE * 8
+
+
+class CheckpointError(ValueError):
+    """Raised for a checkpoint which is corrupt, or in an unknown format."""
+
+
+def encode_int(n: int, out: bytearray):
+    # zigzag, so that small negative numbers stay small, then LEB128
+    n = n << 1 if n >= 0 else (-n << 1) - 1
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read_int(self) -> int:
+        n = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            n |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        return n >> 1 if n & 1 == 0 else -((n + 1) >> 1)
+
+    def read_ints(self) -> List[int]:
+        return [self.read_int() for _ in range(self.read_int())]
+
+    def read_bytes(self, length: int) -> bytes:
+        if self.pos + length > len(self.data):
+            raise CheckpointError("checkpoint is truncated")
+        data = self.data[self.pos : self.pos + length]
+        self.pos += length
+        return data
+
+
+def encode_state(computer: Computer) -> bytes:
+    """
+    Encodes pos, relative_base, halted, instructions_executed, the length of
+    memory, the input queue, pending outputs and then each allocated page.
+    """
+    out = bytearray()
+    for value in (
+        computer.pos,
+        computer.relative_base,
+        int(computer.halted),
+        computer.instructions_executed,
+        len(computer.memory),
+    ):
+        encode_int(value, out)
+
+    for values in (computer.input_queue, computer.output):
+        encode_int(len(values), out)
+        for value in values:
+            encode_int(value, out)
+
+    pages = computer.memory.pages
+    encode_int(len(pages), out)
+    for index in sorted(pages):
+        page = pages[index]
+        encode_int(index, out)
+        if isinstance(page, memoryview):
+            page = copy_page(page)
+        if isinstance(page, array):
+            encode_int(INT64_PAGE, out)
+            if sys.byteorder == "big":
+                page = page[:]
+                page.byteswap()
+            out += page.tobytes()
+        else:
+            encode_int(BIG_INT_PAGE, out)
+            encode_int(len(page), out)
+            for value in page:
+                encode_int(value, out)
+    return bytes(out)
+
+
+def decode_state(data: bytes, computer: Computer):
+    d = Decoder(data)
+    try:
+        computer.pos = d.read_int()
+        computer.relative_base = d.read_int()
+        computer.halted = bool(d.read_int())
+        computer.instructions_executed = d.read_int()
+        length = d.read_int()
+        computer.input_queue = deque(d.read_ints())
+        computer.output = d.read_ints()
+
+        memory = PagedMemory()
+        for _ in range(d.read_int()):
+            index = d.read_int()
+            if d.read_int() == INT64_PAGE:
+                page = array(PAGE_TYPECODE)
+                page.frombytes(d.read_bytes(INT64_PAGE_BYTES))
+                if sys.byteorder == "big":
+                    page.byteswap()
+                memory.pages[index] = page
+            else:
+                memory.pages[index] = d.read_ints()
+        memory.length = length
+    except IndexError:
+        raise CheckpointError("checkpoint is truncated")
+    computer.memory = memory
+
+
+def dumps(computer: Computer) -> bytes:
+    """Returns a checkpoint of computer's state."""
+    body = zlib.compress(encode_state(computer))
+    return HEADER.pack(MAGIC, VERSION, 0, zlib.crc32(body), len(body)) + body
+
+
+def loads(data: bytes, computer_class: Type[Computer] = Computer) -> Computer:
+    """
+    Returns a new computer (of computer_class) in the state saved in a
+    checkpoint. It has no tracer, input_fn or output_fn, so set those again
+    if they are needed.
+    """
+    if len(data) < HEADER.size:
+        raise CheckpointError("checkpoint is truncated")
+    magic, version, flags, checksum, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise CheckpointError("not a checkpoint")
+    if version != VERSION:
+        raise CheckpointError(f"unsupported checkpoint version: {version}")
+    body = data[HEADER.size :]
+    if len(body) != length or zlib.crc32(body) != checksum:
+        raise CheckpointError("checkpoint is corrupt")
+
+    computer = computer_class([])
+    decode_state(zlib.decompress(body), computer)
+    return computer
+
+
+def save(computer: Computer, path: str):
+    """
+    Writes a checkpoint of computer's state to path. The file is replaced
+    atomically, so path always holds a complete checkpoint, either the old
+    one or the new one, even if this is interrupted.
+    """
+    atomic_write(path, dumps(computer))
+
+
+def load(path: str, computer_class: Type[Computer] = Computer) -> Computer:
+    """Returns a new computer in the state saved to path by save()."""
+    with open(path, "rb") as f:
+        return loads(f.read(), computer_class)
+
+
+def run_with_checkpoints(
+    computer: Computer,
+    path: str,
+    every: int,
+    until_blocked=False,
+    resume=False,
+) -> Tuple[List[int], RunResult]:
+    """
+    Runs computer like run(), saving a checkpoint to path after every `every`
+    instructions, and again when it stops.
+
+    Outputs so far are saved as the computer's pending output. To carry on
+    after a crash, load() the checkpoint and pass resume=True, and the
+    outputs returned are the same as if the run had never stopped.
+    """
+    outputs = list(computer.output) if resume else []
+    while True:
+        new_outputs, result = computer.run(
+            until_blocked=until_blocked, max_instructions=every
+        )
+        outputs.extend(new_outputs)
+        computer.output = outputs
+        save(computer, path)
+        if result != RunResult.RUNNABLE:
+            return outputs, result
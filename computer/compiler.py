@@ -0,0 +1,243 @@
+from typing import Callable, List, NamedTuple, Optional, Set, cast
+
+from .computer import CodeCache, Computer, Instruction, ParamMode, RunResult
+
+# opcodes which can be compiled into a block. Input, output and halt always
+# end a block and are run by the interpreter instead.
+STRAIGHT_LINE_OPS = {1, 2, 7, 8, 9}
+JUMP_OPS = {5, 6}
+
+
+class Block(NamedTuple):
+    """
+    A basic block compiled into a Python function. Calling function(computer)
+    runs every instruction in the block (including a jump at the end of it),
+    leaves computer.pos at the next instruction to run and returns the number
+    of instructions which ran.
+
+    Addresses where no block can start (input, output, halt) are cached as
+    blocks with no function, so they only get scanned once.
+    """
+
+    start: int
+    end: int
+    instructions: List[Instruction]
+    function: Optional[Callable[[Computer], int]]
+    source: str
+
+
+class CompiledComputer(Computer):
+    """
+    A Computer which splits the program into basic blocks at jumps and I/O,
+    and compiles each block into a single Python function with its operands
+    resolved ahead of time. Blocks are found through a dispatch dict keyed by
+    their start address; input, output and halt instructions are left to the
+    interpreter.
+
+    A write into a compiled block throws that block away. The written cell is
+    remembered as volatile, and when the block is next compiled it stops short
+    of the instruction holding that cell, which goes back to the interpreter.
+    Programs which patch the address of an instruction before every call
+    don't get recompiled over and over.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blocks: CodeCache[Block] = CodeCache()
+        # code cells which the program has written to
+        self.volatile: Set[int] = set()
+
+    def write(self, value: int, addr: int):
+        super().write(value, addr)
+        if addr in self.blocks.owners:
+            self.code_written(addr)
+
+    def code_written(self, addr: int):
+        self.volatile.add(addr)
+        self.invalidate_code(addr)
+
+    def invalidate_code(self, addr: int):
+        super().invalidate_code(addr)
+        self.blocks.invalidate(addr)
+
+    def fork(self) -> "CompiledComputer":
+        fork = cast(CompiledComputer, super().fork())
+        # compiled functions take the computer as an argument, so are shared
+        fork.blocks = self.blocks.copy()
+        fork.volatile = set(self.volatile)
+        return fork
+
+    def execute(self, budget: int) -> RunResult:
+        blocks = self.blocks
+        remaining = budget
+        result = RunResult.RUNNABLE
+        while remaining > 0:
+            block = blocks.get(self.pos)
+            if block is None:
+                block = self.compile_block(self.pos)
+
+            function = block.function
+            if function is not None and len(block.instructions) <= remaining:
+                remaining -= function(self)
+                continue
+
+            # interpret one instruction: I/O, halt, or the start of a block
+            # which doesn't fit in what is left of the budget
+            remaining -= 1
+            self.instruction = self.decode(self.pos)
+            stop = self.instruction.handler(self)
+            if stop is not None:
+                result = stop
+                if stop == RunResult.BLOCK_ON_INPUT:
+                    remaining += 1
+                break
+
+        self.instructions_executed += budget - remaining
+        return result
+
+    def scan_block(self, start: int) -> List[Instruction]:
+        """
+        Decodes the straight-line instructions starting at start, up to and
+        including the first jump. Stops before any instruction which has to be
+        interpreted, which has been written to, or which doesn't decode at
+        all.
+        """
+        instructions: List[Instruction] = []
+        pos = start
+        while pos < len(self.memory):
+            try:
+                instruction = self.decode(pos)
+            except ValueError:
+                break
+
+            if any(a in self.volatile for a in range(pos, pos + instruction.length)):
+                break
+            elif instruction.opcode in STRAIGHT_LINE_OPS:
+                instructions.append(instruction)
+                pos += instruction.length
+            elif instruction.opcode in JUMP_OPS:
+                instructions.append(instruction)
+                break
+            else:
+                break
+        return instructions
+
+    def compile_block(self, start: int) -> Block:
+        instructions = self.scan_block(start)
+        end = start + sum(i.length for i in instructions)
+
+        if not instructions:
+            # cover the instruction itself, so that overwriting it rescans
+            block = Block(start, start + 1, [], None, "")
+        else:
+            source = BlockCompiler(self, start, end, instructions).source()
+            namespace: dict = {}
+            exec(compile(source, f"<intcode block {start}>", "exec"), namespace)
+            block = Block(start, end, instructions, namespace["block"], source)
+
+        self.blocks.put(block.start, block.end, block)
+        return block
+
+
+class BlockCompiler:
+    """Generates the Python source of the function for one basic block."""
+
+    def __init__(
+        self, computer: Computer, start: int, end: int, instructions: List[Instruction]
+    ):
+        self.start = start
+        self.end = end
+        self.instructions = instructions
+        self.uses_relative_base = any(
+            i.opcode == 9 or ParamMode.RELATIVE in i.param_modes for i in instructions
+        )
+        self.adjusts_relative_base = any(i.opcode == 9 for i in instructions)
+        self.lines: List[str] = []
+
+    def source(self) -> str:
+        self.emit(0, "def block(c):")
+        self.emit(1, "m = c.memory")
+        self.emit(1, "bo = c.blocks.owners")
+        self.emit(1, "do = c.decoded.owners")
+        if self.uses_relative_base:
+            self.emit(1, "rb = c.relative_base")
+
+        pos = self.start
+        for count, instruction in enumerate(self.instructions, start=1):
+            next_pos = pos + instruction.length
+            self.compile_instruction(instruction, next_pos, count)
+            pos = next_pos
+
+        if self.instructions[-1].opcode not in JUMP_OPS:
+            self.exit(1, pos, len(self.instructions))
+
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def exit(self, indent: int, next_pos, count: int):
+        self.emit(indent, f"c.pos = {next_pos}")
+        if self.adjusts_relative_base:
+            self.emit(indent, "c.relative_base = rb")
+        self.emit(indent, f"return {count}")
+
+    def operand(self, mode: ParamMode, param: int) -> str:
+        """Python expression for the value of a parameter."""
+        if mode == ParamMode.IMMEDIATE:
+            return repr(param)
+        if mode == ParamMode.POSITION:
+            return f"m[{param}]"
+        return f"m[rb + {param}]"
+
+    def compile_instruction(self, instruction: Instruction, next_pos: int, count: int):
+        op = instruction.opcode
+        operands = [
+            self.operand(mode, param)
+            for mode, param in zip(instruction.param_modes, instruction.params)
+        ]
+
+        if op == 1:
+            self.store(instruction, f"{operands[0]} + {operands[1]}", next_pos, count)
+        elif op == 2:
+            self.store(instruction, f"{operands[0]} * {operands[1]}", next_pos, count)
+        elif op == 7:
+            value = f"1 if {operands[0]} < {operands[1]} else 0"
+            self.store(instruction, value, next_pos, count)
+        elif op == 8:
+            value = f"1 if {operands[0]} == {operands[1]} else 0"
+            self.store(instruction, value, next_pos, count)
+        elif op == 9:
+            self.emit(1, f"rb += {operands[0]}")
+        elif op == 5 or op == 6:
+            test = "!=" if op == 5 else "=="
+            self.emit(1, f"if {operands[0]} {test} 0:")
+            self.exit(2, operands[1], count)
+            self.exit(1, next_pos, count)
+        else:
+            raise ValueError(f"cannot compile opcode: {op}")
+
+    def store(self, instruction: Instruction, value: str, next_pos: int, count: int):
+        """Stores value to the instruction's last parameter, with a write barrier."""
+        mode, param = instruction.param_modes[-1], instruction.params[-1]
+
+        if mode == ParamMode.IMMEDIATE:
+            # writes in immediate mode do nothing, but the value is still computed
+            self.emit(1, f"v = {value}")
+            return
+
+        if mode == ParamMode.POSITION:
+            self.emit(1, f"m[{param}] = {value}")
+            self.emit(1, f"if {param} in bo or {param} in do:")
+            self.emit(2, f"c.code_written({param})")
+            if next_pos <= param < self.end:
+                # the rest of this block was just overwritten
+                self.exit(2, next_pos, count)
+            return
+
+        self.emit(1, f"a = rb + {param}")
+        self.emit(1, f"m[a] = {value}")
+        self.emit(1, "if a in bo or a in do:")
+        self.emit(2, "c.code_written(a)")
+        self.emit(2, f"if {next_pos} <= a < {self.end}:")
+        self.exit(3, next_pos, count)
@@ -1,6 +1,29 @@
+from collections import deque
+import copy
 from enum import Enum, unique
-from typing import List, Tuple, Optional
-import logging
+import io
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .image import FILE_MAGIC, ProgramImage
+from .memory import PagedMemory
+
+if TYPE_CHECKING:
+    from .tracing import Tracer
 
 
 class RunResult(Enum):
@@ -16,8 +39,6 @@ class ParamMode(Enum):
     RELATIVE = 2
 
 
-MAX_MEMORY = 2000
-
 NUM_PARAMS = {
     1: 3,  # addition: two operands and the storage location
     2: 3,  # multiplication
@@ -44,42 +65,245 @@ OP_NAMES = {
     99: "HALT",
 }
 
+# the (one-indexed) parameter which each opcode writes to
+WRITE_PARAMS = {
+    1: 3,
+    2: 3,
+    3: 1,
+    7: 3,
+    8: 3,
+}
+
+
+# programs at least this long (in characters) are parsed with NumPy, when
+# it's installed
+FAST_PARSE_LENGTH = 1 << 16
+
 
 def parse_program(program_string):
+    if len(program_string) >= FAST_PARSE_LENGTH:
+        program = parse_int64_program(program_string)
+        if program is not None:
+            return program
     return list(map(int, program_string.split(",")))
 
 
+def parse_int64_program(program_string: str) -> Optional[List[int]]:
+    """
+    Parses a program with NumPy, which is faster for a large one holding
+    small values. Returns None if NumPy isn't installed, or the program isn't
+    one it can parse, such as one holding values which don't fit in int64.
+    """
+    try:
+        import numpy as np  # type: ignore
+    except ImportError:
+        return None
+    try:
+        # raises ValueError for an empty value, text which isn't a value, a
+        # value which doesn't fit in int64, or a program over several lines
+        values = np.loadtxt(
+            io.StringIO(program_string),
+            dtype=np.int64,
+            delimiter=",",
+            comments=None,
+            ndmin=1,
+        )
+    except ValueError:
+        return None
+    return values.tolist()
+
+
+def load_program(path: str) -> ProgramImage:
+    """
+    Loads the program in a file, either a program file written by
+    ProgramImage.save() or a program in text.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(FILE_MAGIC))
+    if magic == FILE_MAGIC:
+        return ProgramImage.load(path)
+    with open(path) as f:
+        return ProgramImage(parse_program(f.read().strip()))
+
+
+def encode_ascii(text: str) -> List[int]:
+    """The inputs which send text to a program speaking ASCII."""
+    return list(text.encode("ascii"))
+
+
+def decode_ascii(values: Iterable[int]) -> str:
+    """
+    The text output by a program speaking ASCII. Raises ValueError if any
+    value isn't an ASCII character.
+    """
+    return bytes(values).decode("ascii")
+
+
+class Instruction(NamedTuple):
+    """
+    An instruction decoded from memory: its opcode, the handler which executes
+    it, the mode of each parameter and the raw parameter values which follow
+    the opcode in memory.
+    """
+
+    opcode: int
+    handler: Callable[["Computer"], Optional[RunResult]]
+    param_modes: List[ParamMode]
+    params: List[int]
+
+    @property
+    def length(self) -> int:
+        return 1 + len(self.params)
+
+
+T = TypeVar("T")
+
+
+class CodeCache(Generic[T]):
+    """
+    Caches values derived from a range of memory cells (like decoded
+    instructions), keyed by the address where the range starts.
+
+    Intcode programs are allowed to modify themselves, so a write to any cell
+    in a cached range must call invalidate() to drop the entries which were
+    derived from that cell. Entries which don't cover the written cell are
+    kept.
+
+    copy() is copy-on-write: the copy shares the original's entries until
+    either of them changes its entries, which then gets its own.
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, Tuple[int, T]] = {}
+        # cell address -> start addresses of the entries covering that cell.
+        # The sets are replaced rather than changed, so copies can share them.
+        self.owners: Dict[int, FrozenSet[int]] = {}
+        # True while entries and owners may be shared with a copy
+        self.shared = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, start: int) -> Optional[T]:
+        entry = self.entries.get(start)
+        return entry[1] if entry is not None else None
+
+    def own(self):
+        """Makes private copies of entries and owners, if they are shared."""
+        if self.shared:
+            self.entries = dict(self.entries)
+            self.owners = dict(self.owners)
+            self.shared = False
+
+    def put(self, start: int, end: int, value: T):
+        """Caches value as derived from the cells in [start, end)."""
+        self.discard(start)
+        self.own()
+        self.entries[start] = (end, value)
+        owners = self.owners
+        for addr in range(start, end):
+            owners[addr] = owners.get(addr, frozenset()) | {start}
+
+    def discard(self, start: int):
+        if start not in self.entries:
+            return
+        self.own()
+        entry = self.entries.pop(start)
+        owners = self.owners
+        for addr in range(start, entry[0]):
+            starts = owners.get(addr)
+            if starts is not None:
+                starts -= {start}
+                if starts:
+                    owners[addr] = starts
+                else:
+                    del owners[addr]
+
+    def invalidate(self, addr: int):
+        """Drops every entry derived from the cell at addr."""
+        for start in list(self.owners.get(addr, ())):
+            self.discard(start)
+
+    def clear(self):
+        self.entries = {}
+        self.owners = {}
+        self.shared = False
+
+    def copy(self) -> "CodeCache[T]":
+        copy: CodeCache[T] = CodeCache()
+        copy.entries = self.entries
+        copy.owners = self.owners
+        copy.shared = self.shared = True
+        return copy
+
+
+class Snapshot(NamedTuple):
+    """
+    The state of a Computer at one point, to be restored later. Memory is a
+    copy-on-write copy, so taking a snapshot is cheap and running on after it
+    only copies the pages which are written.
+    """
+
+    memory: PagedMemory
+    pos: int
+    relative_base: int
+    input_queue: Tuple[int, ...]
+    halted: bool
+    instructions_executed: int
+
+
+class NoInputError(IndexError):
+    """
+    Raised by an input instruction when there is no input for it and the
+    computer isn't running until_blocked.
+    """
+
+
 class Computer(object):
     def __init__(
         self,
-        opcodes: List[int],
+        opcodes: Union[List[int], ProgramImage],
         inputs=None,
-        max_memory_length: int = MAX_MEMORY,
-        initial_memory_size: Optional[int] = None,
+        tracer: Optional["Tracer"] = None,
+        input_fn: Optional[Callable[[], Optional[int]]] = None,
+        output_fn: Optional[Callable[[int], None]] = None,
     ):
-        self.logger = logging.getLogger(__name__)
-
-        self.memory: List[int] = list(opcodes)  # make a copy
-        self.max_memory_length = max_memory_length
-
-        if initial_memory_size:
-            self.extend_memory_if_necessary(initial_memory_size)
-
-        self.pos = 0
+        if isinstance(opcodes, ProgramImage):
+            # share the image's pages until they are written
+            self.memory = opcodes.new_memory()
+            self.pos = opcodes.pos
+        else:
+            self.memory = PagedMemory(opcodes)  # make a copy
+            self.pos = 0
 
-        self.input_queue: List[int] = []
+        self.input_queue: Deque[int] = deque()
         if inputs:
             if isinstance(inputs, int):
                 self.add_input(inputs)
             else:
-                for i in inputs:
-                    self.add_input(i)
+                self.add_inputs(inputs)
 
-        self.current_op = None
-        self.param_modes: List[ParamMode] = []
-        self.relative_base = 0
+        # instructions decoded so far, keyed by their address
+        self.decoded: CodeCache[Instruction] = CodeCache()
+        self.instruction: Optional[Instruction] = None
+        self.relative_base = (
+            opcodes.relative_base if isinstance(opcodes, ProgramImage) else 0
+        )
         self.run_until_block_mode = False
         self.halted = False
+        # when set, every instruction, memory access and I/O is reported to it
+        self.tracer = tracer
+        # when set, called for the next input whenever the input queue is
+        # empty. Returning None means no input is available yet, which
+        # blocks a run until_blocked, and otherwise raises NoInputError.
+        self.input_fn = input_fn
+        # when set, called with each output instead of collecting it in the
+        # list returned by run()
+        self.output_fn = output_fn
+        self.outputs_remaining: Optional[int] = None
+        self.output: List[int] = []
+        # total number of instructions run, over every call to run()
+        self.instructions_executed = 0
 
     def read(self, absolute: int = None, offset: int = None) -> int:
         """Reads one value from memory"""
@@ -93,32 +317,84 @@ class Computer(object):
         else:
             raise ValueError("Must pass either absolute or offset kwarg")
 
-        self.extend_memory_if_necessary(addr)
-        value = self.memory[addr]
-        self.logger.debug("read: reading address=%d, value=%d", addr, value)
-        return value
+        return self.memory[addr]
 
     def write(self, value: int, addr: int):
         """Writes value to memory at address addr"""
-        self.extend_memory_if_necessary(addr)
-        self.logger.debug("write: writing address=%d, value=%d", addr, value)
         self.memory[addr] = value
+        if addr in self.decoded.owners:
+            self.code_written(addr)
+
+    def code_written(self, addr: int):
+        """Called after a write lands on a cell holding decoded code."""
+        self.invalidate_code(addr)
+
+    def invalidate_code(self, addr: int):
+        """Drops everything cached from the cell at addr."""
+        self.decoded.invalidate(addr)
+
+    def fork(self) -> "Computer":
+        """
+        Returns an independent copy of this computer, which carries on from
+        the same state. Memory pages are shared until one of the two writes to
+        them, so forking is cheap even for a large memory, and instructions
+        decoded so far are shared until one of the two invalidates any.
+
+        The fork keeps the same tracer, input_fn and output_fn; set them on
+        the fork if it should do its I/O elsewhere.
+        """
+        fork = copy.copy(self)
+        fork.memory = self.memory.copy()
+        fork.input_queue = deque(self.input_queue)
+        fork.output = list(self.output)
+        fork.decoded = self.decoded.copy()
+        return fork
+
+    def snapshot(self) -> Snapshot:
+        """Captures the current state, to go back to later with restore()."""
+        return Snapshot(
+            self.memory.copy(),
+            self.pos,
+            self.relative_base,
+            tuple(self.input_queue),
+            self.halted,
+            self.instructions_executed,
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Goes back to the state captured by snapshot. A snapshot can be
+        restored any number of times. Cached code is dropped only for the
+        cells which have changed since the snapshot was taken.
+        """
+        for addr in self.memory.changed_cells(snapshot.memory):
+            self.invalidate_code(addr)
+
+        self.memory = snapshot.memory.copy()
+        self.pos = snapshot.pos
+        self.relative_base = snapshot.relative_base
+        self.input_queue = deque(snapshot.input_queue)
+        self.halted = snapshot.halted
+        self.instructions_executed = snapshot.instructions_executed
+        self.instruction = None
+
+    @property
+    def current_op(self) -> Optional[int]:
+        return self.instruction.opcode if self.instruction else None
+
+    @property
+    def param_modes(self) -> List[ParamMode]:
+        return self.instruction.param_modes if self.instruction else []
 
     def read_param(self, param_num: int) -> int:
         """
         Reads a value from memory based on the given parameter number
         (one-indexed), taking its parameter mode into account.
         """
-        assert param_num > 0
-
-        mode = self.param_modes[param_num - 1]
-        param_value = self.read(offset=param_num)
-        self.logger.info(
-            "read_param: param_num=%d mode=%s param_value=%d",
-            param_num,
-            mode,
-            param_value,
-        )
+        assert param_num > 0 and self.instruction is not None
+
+        mode = self.instruction.param_modes[param_num - 1]
+        param_value = self.instruction.params[param_num - 1]
 
         if mode == ParamMode.POSITION:
             return self.read(absolute=param_value)
@@ -132,21 +408,28 @@ class Computer(object):
         else:
             raise ValueError(f"unknown param mode: {mode}")
 
+    def param_address(self, mode: ParamMode, param_value: int) -> Optional[int]:
+        """
+        The address a parameter refers to, or None for a parameter in
+        immediate mode.
+        """
+        if mode == ParamMode.POSITION:
+            return param_value
+
+        elif mode == ParamMode.RELATIVE:
+            return self.relative_base + param_value
+
+        return None
+
     def write_param(self, param_num: int, value: int):
         """
         Write a value to memory based on the given parameter number
         (one-indexed),taking its parameter mode into account.
         """
-        assert param_num > 0
-
-        mode = self.param_modes[param_num - 1]
-        param_value = self.read(offset=param_num)
-        self.logger.info(
-            "write_param: param_num=%d mode=%s param_value=%d",
-            param_num,
-            mode,
-            param_value,
-        )
+        assert param_num > 0 and self.instruction is not None
+
+        mode = self.instruction.param_modes[param_num - 1]
+        param_value = self.instruction.params[param_num - 1]
 
         if mode == ParamMode.POSITION:
             self.write(value, addr=param_value)
@@ -161,137 +444,153 @@ class Computer(object):
         else:
             raise ValueError(f"unknown param mode: {mode}")
 
-    def extend_memory_if_necessary(self, pos: int):
-        assert (
-            pos < self.max_memory_length
-        ), f"pos={pos} is too high, max memory setting ({self.max_memory_length})"
-
-        while pos >= len(self.memory):
-            self.memory.append(0)
-
     def add_input(self, val: int):
         """Add input val to end of input queue"""
         self.input_queue.append(val)
 
+    def add_inputs(self, values: Iterable[int]):
+        """Adds every value to the end of the input queue, in order."""
+        self.input_queue.extend(values)
+
+    def add_ascii(self, text: str):
+        """Adds text to the end of the input queue, one character per input."""
+        self.input_queue.extend(text.encode("ascii"))
+
     # opcode 1
-    def add(self):
+    def add(self) -> Optional[RunResult]:
         a = self.read_param(1)
         b = self.read_param(2)
 
-        self.logger.info(f"adding %d + %d", a, b)
         self.write_param(3, a + b)
 
         self.pos += 4
+        return None
 
     # opcode 2
-    def mult(self):
+    def mult(self) -> Optional[RunResult]:
         a = self.read_param(1)
         b = self.read_param(2)
 
-        self.logger.info("mult %d * %d", a, b)
         self.write_param(3, a * b)
 
         self.pos += 4
+        return None
 
     # opcode 3
     # Opcode 3 takes a single integer as input and saves it to the position
     # given by its only parameter. For example, the instruction 3,50 would
     # take an input value and store it at address 50.
-    def read_input(self):
-        if self.run_until_block_mode and len(self.input_queue) == 0:
-            return True
+    def read_input(self) -> Optional[RunResult]:
+        if not self.input_queue and self.input_fn is not None:
+            next_input = self.input_fn()
+            if next_input is not None:
+                self.input_queue.append(next_input)
+
+        if len(self.input_queue) == 0:
+            if self.run_until_block_mode:
+                return RunResult.BLOCK_ON_INPUT
+            source = "input_fn returned None" if self.input_fn else "no inputs given"
+            raise NoInputError(
+                f"the input instruction at {self.pos} has no input ({source});"
+                + " run with until_blocked=True to stop there instead"
+            )
 
-        next_input = self.input_queue.pop(0)
-        self.logger.info("read_input: input is %d", next_input)
+        next_input = self.input_queue.popleft()
         self.write_param(1, next_input)
 
         self.pos += 2
-        return False
+        return None
 
     # Opcode 4 outputs the value of its only parameter. For example,
     # the instruction 4,50 would output the value at address 50.
-    def store_output(self):
+    def store_output(self) -> Optional[RunResult]:
         val = self.read_param(1)
-        self.logger.info("store_output: outputting: %d", val)
-        self.output.append(val)
+        if self.output_fn is None:
+            self.output.append(val)
+        else:
+            self.output_fn(val)
 
         self.pos += 2
 
-    def jump_if_true(self):
+        if self.outputs_remaining is not None:
+            self.outputs_remaining -= 1
+            if self.outputs_remaining == 0:
+                return RunResult.RUNNABLE
+        return None
+
+    def jump_if_true(self) -> Optional[RunResult]:
         # if the first parameter is non-zero, it sets the instruction pointer
         # to the value from the second parameter. Otherwise, it does nothing.
         p = self.read_param(1)
-        self.logger.info("jump_if_true: testing if %d is non-zero", p)
         if p != 0:
             pos = self.read_param(2)
-            self.logger.info("jump_if_true: jumping to %d", pos)
             self.pos = pos
         else:
             self.pos += 3
+        return None
 
-    def jump_if_false(self):
+    def jump_if_false(self) -> Optional[RunResult]:
         # if the first parameter is zero, it sets the instruction pointer
         # to the value from the second parameter. Otherwise, it does nothing.
         p = self.read_param(1)
-        self.logger.info("jump_if_false: testing if %d is zero", p)
         if p == 0:
             pos = self.read_param(2)
-            self.logger.info("jump_if_false: jumping to %d", pos)
             self.pos = pos
         else:
             self.pos += 3
+        return None
 
-    def less_than(self):
+    def less_than(self) -> Optional[RunResult]:
         # if the first parameter is less than the second parameter, it stores 1
         # in the position given by the third parameter. Otherwise, it stores 0.
         a = self.read_param(1)
         b = self.read_param(2)
 
         val = 1 if a < b else 0
-        self.logger.info("less_than: testing if %d < %d, result=%d", a, b, val)
         self.write_param(3, val)
 
         self.pos += 4
+        return None
 
-    def equal(self):
+    def equal(self) -> Optional[RunResult]:
         # if the first parameter is equal to the second parameter, it stores 1
         # in the position given by the third parameter. Otherwise, it stores 0.
         a = self.read_param(1)
         b = self.read_param(2)
 
         val = 1 if a == b else 0
-        self.logger.info("equal: testing if %d == %d, result=%d", a, b, val)
         self.write_param(3, val)
 
         self.pos += 4
+        return None
 
-    def adjust_relative_base(self):
+    def adjust_relative_base(self) -> Optional[RunResult]:
         adjustment = self.read_param(1)
-        self.logger.info(
-            "adjust_relative_base: relative_base=%d, offset=%d, new base=%d",
-            self.relative_base,
-            adjustment,
-            self.relative_base + adjustment,
-        )
         self.relative_base += adjustment
 
         self.pos += 2
+        return None
+
+    def halt(self) -> Optional[RunResult]:
+        return RunResult.HALTED
 
     def parse_instruction(self, inst):
         """
         Parameter modes are stored in the same value as the instruction's opcode.
-        
-        The opcode is a two-digit number based only on the ones and tens digit of 
-        the value, that is, the opcode is the rightmost two digits of the first 
-        value in an instruction. 
-        
-        Parameter modes are single digits, one per parameter, read right-to-left 
-        from the opcode: the first parameter's mode is in the hundreds digit, 
-        the second parameter's mode is in the thousands digit, the third parameter's 
+
+        The opcode is a two-digit number based only on the ones and tens digit of
+        the value, that is, the opcode is the rightmost two digits of the first
+        value in an instruction.
+
+        Parameter modes are single digits, one per parameter, read right-to-left
+        from the opcode: the first parameter's mode is in the hundreds digit,
+        the second parameter's mode is in the thousands digit, the third parameter's
         mode is in the ten-thousands digit, and so on. Any missing modes are 0.
         """
         # right two most digits
         opcode = inst % 100
+        if opcode not in HANDLERS:
+            raise ValueError(f"unknown opcode: {opcode}")
         param_count = NUM_PARAMS[opcode]
         param_modes = []
         # start with hundreds digit
@@ -302,91 +601,164 @@ class Computer(object):
             a *= 10
             b *= 10
 
-        self.logger.info(
-            "parse_instruction: inst=%d, storing current_op=%d (%s) param_modes=%s",
-            inst,
-            opcode,
-            OP_NAMES[opcode],
-            param_modes,
-        )
-        self.current_op = opcode
-        self.param_modes = param_modes
+        self.instruction = Instruction(opcode, HANDLERS[opcode], param_modes, [])
+        return self.instruction
 
-    def run(self, until_blocked=False) -> Tuple[List[int], RunResult]:
+    def decode(self, pos: int) -> Instruction:
+        """
+        Decodes the instruction at address pos, or returns the cached decoding
+        if the instruction hasn't been written to since it was last decoded.
+        """
+        instruction = self.decoded.get(pos)
+        if instruction is not None:
+            return instruction
+
+        parsed = self.parse_instruction(self.read(absolute=pos))
+        params = [
+            self.read(absolute=pos + n) for n in range(1, 1 + len(parsed.param_modes))
+        ]
+        instruction = parsed._replace(params=params)
+        self.decoded.put(pos, pos + instruction.length, instruction)
+        return instruction
+
+    def run(
+        self,
+        until_blocked=False,
+        until_outputs: Optional[int] = None,
+        max_instructions: Optional[int] = None,
+    ) -> Tuple[List[int], RunResult]:
         """
-        Runs the program until halted, or if until_blocked is True, stops when blocked on input. Returns the output. 
+        Runs the program until halted, or if until_blocked is True, stops when blocked on input. Returns the output.
         To check the program after running, look at .opcodes.
+
+        If until_outputs is set, also stops (with RunResult.RUNNABLE) once
+        that many values have been output. If max_instructions is set, stops
+        (with RunResult.RUNNABLE) after running that many instructions, so the
+        run can be resumed later by calling run() again.
         """
 
         if self.halted:
             raise ValueError("Cannot run halted computer")
 
         self.run_until_block_mode = until_blocked
+        self.outputs_remaining = until_outputs
 
-        self.logger.info("starting program: %s", self.memory)
-
-        self.output: List[int] = []
+        self.output = []
 
-        while self.pos < len(self.memory):
-            result = self.run_one_iteration()
-            if result == RunResult.HALTED:
-                self.halted = True
-                return self.output, result
-            elif result == RunResult.BLOCK_ON_INPUT and until_blocked == True:
-                return self.output, result
-
-        raise ValueError(
-            f"Logic error: pos ({self.pos}) past memory (len={len(self.memory)})"
-        )
+        budget = sys.maxsize if max_instructions is None else max_instructions
+        if self.tracer is None:
+            result = self.execute(budget)
+        else:
+            self.tracer.on_run_start(self)
+            result = self.execute_traced(budget)
+        if result == RunResult.HALTED:
+            self.halted = True
+        if self.tracer is not None:
+            self.tracer.on_run_end(self, result)
+        return self.output, result
+
+    def execute(self, budget: int) -> RunResult:
+        """
+        Runs instructions until one of them stops the run, by halting, by
+        blocking on input or by producing the last output asked for, or until
+        budget instructions have run.
+        """
+        decoded = self.decoded
+        remaining = budget
+        result = RunResult.RUNNABLE
+        while remaining > 0:
+            remaining -= 1
+            instruction = decoded.get(self.pos) or self.decode(self.pos)
+            self.instruction = instruction
+            stop = instruction.handler(self)
+            if stop is not None:
+                result = stop
+                if stop == RunResult.BLOCK_ON_INPUT:
+                    # the input instruction will run again when resumed
+                    remaining += 1
+                break
+
+        self.instructions_executed += budget - remaining
+        return result
+
+    def execute_traced(self, budget: int) -> RunResult:
+        """
+        Like execute(), but reports each instruction to self.tracer before
+        running it, along with the memory it reads, and then reports what it
+        wrote, read as input or output.
+        """
+        tracer = self.tracer
+        assert tracer is not None
+
+        for _ in range(budget):
+            pos = self.pos
+            instruction = self.decode(pos)
+            tracer.on_instruction(self, pos, instruction)
+
+            opcode = instruction.opcode
+            addrs = [
+                self.param_address(mode, param)
+                for mode, param in zip(instruction.param_modes, instruction.params)
+            ]
+            write_param = WRITE_PARAMS.get(opcode)
+            write_addr = addrs[write_param - 1] if write_param else None
+
+            for n, addr in enumerate(addrs, start=1):
+                if n == write_param:
+                    continue
+                if addr is None:
+                    value = instruction.params[n - 1]
+                else:
+                    value = self.read(absolute=addr)
+                    tracer.on_read(self, addr, value)
+                if n == 1 and opcode in (5, 6):
+                    # jumps only read their target when they take the jump
+                    taken = value != 0 if opcode == 5 else value == 0
+                    if not taken:
+                        break
+
+            if write_addr is not None:
+                old_value = self.read(absolute=write_addr)
+            if opcode == 3 and not self.input_queue and self.input_fn is not None:
+                # fetch the input the handler would ask for, so it can be reported
+                fetched = self.input_fn()
+                if fetched is not None:
+                    self.input_queue.append(fetched)
+            next_input = self.input_queue[0] if self.input_queue else None
+
+            self.instruction = instruction
+            result = instruction.handler(self)
+
+            if result == RunResult.BLOCK_ON_INPUT:
+                return result
+            self.instructions_executed += 1
+            if opcode == 3:
+                assert next_input is not None
+                tracer.on_input(self, next_input)
+            if write_addr is not None:
+                tracer.on_write(self, write_addr, old_value, self.memory[write_addr])
+            if opcode == 4:
+                tracer.on_output(self, self.read_param(1))
+            if result is not None:
+                return result
+
+        return RunResult.RUNNABLE
 
     def run_one_iteration(self) -> RunResult:
         """Runs one instruction of the program."""
-        self.logger.info("")
-        self.logger.info("run: at position=%d opcodes=%s", self.pos, self.memory)
-
-        self.parse_instruction(self.read(offset=0))
-
-        if self.current_op == 1:
-            self.add()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 2:
-            self.mult()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 3:
-            blocked = self.read_input()
-            if blocked:
-                return RunResult.BLOCK_ON_INPUT
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 4:
-            self.store_output()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 5:
-            self.jump_if_true()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 6:
-            self.jump_if_false()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 7:
-            self.less_than()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 8:
-            self.equal()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 9:
-            self.adjust_relative_base()
-            return RunResult.RUNNABLE
-
-        elif self.current_op == 99:
-            self.logger.info("halt - output: %s", self.memory)
-            return RunResult.HALTED
-
-        else:
-            raise ValueError(f"unknown opcode: {self.current_op}")
+        self.instruction = self.decode(self.pos)
+        return self.instruction.handler(self) or RunResult.RUNNABLE
+
+
+HANDLERS: Dict[int, Callable[[Computer], Optional[RunResult]]] = {
+    1: Computer.add,
+    2: Computer.mult,
+    3: Computer.read_input,
+    4: Computer.store_output,
+    5: Computer.jump_if_true,
+    6: Computer.jump_if_false,
+    7: Computer.less_than,
+    8: Computer.equal,
+    9: Computer.adjust_relative_base,
+    99: Computer.halt,
+}
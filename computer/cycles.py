@@ -0,0 +1,181 @@
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Tuple
+
+from .memory import PAGE_SHIFT, PAGE_SIZE, Page, PagedMemory
+from .tracing import Tracer
+
+if TYPE_CHECKING:
+    from .computer import Computer, Snapshot
+
+HASH_MASK = (1 << 64) - 1
+
+
+class Cycle(NamedTuple):
+    # the address of an instruction on the cycle, where it was seen to repeat
+    pos: int
+    # instructions run on each trip round the cycle
+    length: int
+    # instructions_executed when the cycle was first seen at pos
+    entered_at: int
+
+
+class RunawayError(ValueError):
+    """
+    Raised out of run() by a CycleDetector, when the computer is proven to be
+    in a cycle (which is given as .cycle) or has run over its budget.
+    """
+
+    def __init__(self, message: str, cycle: Optional[Cycle] = None):
+        super().__init__(message)
+        self.cycle = cycle
+
+
+def cell_hash(addr: int, value: int) -> int:
+    # cells holding 0 don't count, so memory past the end needn't be hashed
+    return hash((addr, value)) & HASH_MASK if value else 0
+
+
+def page_hash(memory: PagedMemory, index: int) -> int:
+    page: Optional[Page] = memory.pages.get(index)
+    if page is None:
+        return 0
+    start = index << PAGE_SHIFT
+    return sum(cell_hash(start + n, value) for n, value in enumerate(page))
+
+
+def memory_hash(memory: PagedMemory, indexes: Iterable[int]) -> int:
+    """The hash of the cells in the pages at indexes."""
+    return sum(page_hash(memory, index) for index in indexes) & HASH_MASK
+
+
+def same_memory(a: PagedMemory, b: PagedMemory) -> bool:
+    for index in a.changed_pages(b):
+        start = index << PAGE_SHIFT
+        if any(a[addr] != b[addr] for addr in range(start, start + PAGE_SIZE)):
+            return False
+    return True
+
+
+class CycleDetector(Tracer):
+    """
+    Stops a computer which is running forever without doing any input or
+    output, by raising RunawayError out of run().
+
+    The state of the computer is fingerprinted after every backward jump:
+    its pos, relative base and a hash of memory, which is kept up to date on
+    every write rather than recomputed. Between runs, only the pages which
+    changed are hashed again. Fingerprints are compared using
+    Brent's algorithm, so only one is kept, and a cycle is found within a few
+    trips of entering it. A match is only a suspect until the computer is
+    seen to go round the same cycle again, from exactly the same state.
+
+    Input or output breaks any cycle, as the computer is then doing work or
+    waiting for it. If max_instructions is set, running more than that many
+    instructions in total also raises RunawayError.
+    """
+
+    def __init__(self, max_instructions: Optional[int] = None):
+        self.max_instructions = max_instructions
+        self.memory_hash = 0
+        # the computer at the end of its last run, and a copy of its memory
+        # and the memory's hash then
+        self.computer: Optional["Computer"] = None
+        self.memory: Optional[PagedMemory] = None
+        self.memory_hash_at_end = 0
+        self.last_pos = -1
+        self.reset()
+
+    def reset(self):
+        """Forgets the fingerprints seen so far."""
+        self.saved: Optional[Tuple[int, int, int]] = None
+        self.saved_at = 0
+        # backward jumps since the fingerprint was saved, and the number at
+        # which the next one is saved
+        self.jumps = 0
+        self.limit = 1
+        # a suspected cycle, and the state it was suspected in
+        self.suspect: Optional[Cycle] = None
+        self.suspect_jumps = 0
+        self.snapshot: Optional["Snapshot"] = None
+
+    def on_run_start(self, computer):
+        # memory may have been changed between runs
+        memory = computer.memory
+        if computer is self.computer and self.memory is not None:
+            changed = memory.changed_pages(self.memory)
+            self.memory_hash = (
+                self.memory_hash_at_end
+                - memory_hash(self.memory, changed)
+                + memory_hash(memory, changed)
+            ) & HASH_MASK
+        else:
+            self.memory_hash = memory_hash(memory, memory.pages)
+        self.last_pos = -1
+        self.reset()
+
+    def on_run_end(self, computer, result):
+        # copy-on-write, so this only copies pages written to after
+        self.computer = computer
+        self.memory = computer.memory.copy()
+        self.memory_hash_at_end = self.memory_hash
+
+    def on_write(self, computer, addr, old_value, value):
+        self.memory_hash = (
+            self.memory_hash - cell_hash(addr, old_value) + cell_hash(addr, value)
+        ) & HASH_MASK
+
+    def on_input(self, computer, value):
+        self.reset()
+
+    def on_output(self, computer, value):
+        self.reset()
+
+    def on_instruction(self, computer, pos, instruction):
+        executed = computer.instructions_executed
+        if self.max_instructions is not None and executed >= self.max_instructions:
+            raise RunawayError(
+                f"ran over the budget of {self.max_instructions} instructions"
+            )
+
+        backward = pos <= self.last_pos
+        self.last_pos = pos
+        if not backward:
+            return
+
+        if self.suspect is not None:
+            self.check_suspect(computer, pos)
+            return
+
+        fingerprint = (pos, computer.relative_base, self.memory_hash)
+        self.jumps += 1
+        if fingerprint == self.saved:
+            self.suspect = Cycle(pos, executed - self.saved_at, self.saved_at)
+            self.suspect_jumps = self.jumps
+            self.jumps = 0
+            self.snapshot = computer.snapshot()
+        elif self.jumps == self.limit:
+            self.saved = fingerprint
+            self.saved_at = executed
+            self.jumps = 0
+            self.limit *= 2
+
+    def check_suspect(self, computer, pos: int):
+        """Checks a suspected cycle, once it has had time to go round again."""
+        assert self.suspect is not None and self.snapshot is not None
+        self.jumps += 1
+        if self.jumps < self.suspect_jumps:
+            return
+
+        snapshot, cycle = self.snapshot, self.suspect
+        if (
+            pos == snapshot.pos
+            and computer.relative_base == snapshot.relative_base
+            and computer.instructions_executed - snapshot.instructions_executed
+            == cycle.length
+            and same_memory(computer.memory, snapshot.memory)
+        ):
+            raise RunawayError(
+                f"stuck in a cycle of {cycle.length} instructions at {cycle.pos}",
+                cycle,
+            )
+        # the fingerprints collided; start looking again
+        self.reset()
@@ -0,0 +1,18 @@
+# Small programs shared by the tests.
+
+from .computer import parse_program
+
+# the larger example from Day 5: outputs 999 if the input is below 8, 1000 if
+# it is 8, and 1001 if it is above 8
+LARGER_EXAMPLE = parse_program(
+    "3,21,1008,21,8,20,1005,20,22,107,8,21,20,1006,20,31,1106,0,36,98,0,0,1002,21,125,20,4,20,1105,1,46,104,999,1105,1,46,1101,1000,1,20,4,20,1105,1,46,98,99"
+)
+
+# count down from 3 at addr 11, outputting the counter each time round
+COUNTDOWN = parse_program("1001,11,-1,11,4,11,1005,11,0,99,0,3")
+
+# echo inputs until a 0 is read
+ECHO = parse_program("3,9,4,9,1005,9,0,99,0,0")
+
+# count down from 10000, then output 1
+BUSY = parse_program("1001,10,-1,10,1005,10,0,104,1,99,10000")
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from typing import Iterable, Union
+
+Data = Union[bytes, bytearray, memoryview]
+
+
+def atomic_write(path: str, data: Union[Data, Iterable[Data]]):
+    """
+    Writes data, which is bytes or an iterable of chunks of bytes, to a file
+    at path. The data is written to a temporary file which is synced to disk
+    and then renamed over path, so path always holds either its old contents
+    or all of data, even if this is interrupted or the system crashes.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,68 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sized, Tuple
+
+
+def frames(outputs: Iterable[int], width: int) -> Iterator[Tuple[int, ...]]:
+    """
+    Yields outputs in frames of width values, e.g. the (x, y, tile) triples
+    of a screen. Raises ValueError if outputs (when its length is known)
+    doesn't divide into whole frames.
+    """
+    if isinstance(outputs, Sized) and len(outputs) % width:
+        raise ValueError(f"{len(outputs)} outputs don't make frames of {width}")
+    return zip(*[iter(outputs)] * width)
+
+
+def frame_array(outputs: List[int], width: int, out: Optional[Any] = None) -> Any:
+    """
+    Returns outputs as a NumPy (K, width) int64 array of K frames, filling
+    out (which must be a C-contiguous int64 array with room for K frames or
+    more) if given, rather than allocating one. The values are converted in
+    bulk, so this is the way to take thousands of frames at once.
+
+    Raises ValueError if outputs don't divide into whole frames or don't fit
+    in out, and OverflowError if a value doesn't fit in int64.
+    """
+    import numpy as np  # type: ignore
+
+    if len(outputs) % width:
+        raise ValueError(f"{len(outputs)} outputs don't make frames of {width}")
+    rows = len(outputs) // width
+    if out is None:
+        return np.array(outputs, dtype=np.int64).reshape(rows, width)
+
+    if out.shape[1:] != (width,) or len(out) < rows:
+        raise ValueError(f"{rows} frames of {width} don't fit in {out.shape}")
+    # a view, as out is contiguous
+    flat = out.reshape(-1)
+    flat[: len(outputs)] = outputs
+    return out[:rows]
+
+
+class FrameDecoder:
+    """
+    An output_fn which collects outputs into frames of width values, and
+    calls on_frame with the values of each frame as soon as it is complete.
+    """
+
+    def __init__(self, width: int, on_frame: Callable[..., Any]):
+        self.width = width
+        self.on_frame = on_frame
+        self.pending = [0] * width
+        # values of the current frame received so far
+        self.count = 0
+
+    def __call__(self, value: int):
+        self.pending[self.count] = value
+        self.count += 1
+        if self.count == self.width:
+            self.count = 0
+            self.on_frame(*self.pending)
+
+    @property
+    def complete(self) -> bool:
+        """True unless part of a frame has been received."""
+        return self.count == 0
+
+    def reset(self):
+        """Forgets any part of a frame received."""
+        self.count = 0
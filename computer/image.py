@@ -0,0 +1,204 @@
+from array import array
+import mmap
+import struct
+import sys
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Tuple, Union
+
+from .files import atomic_write
+from .memory import PAGE_SHIFT, PAGE_SIZE, PAGE_TYPECODE, PagedMemory
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+# a shared memory block holds the number of cells in the image, where to
+# start and the relative base to start with, then the cells of every page
+HEADER = struct.Struct("qqq")
+CELL_SIZE = array(PAGE_TYPECODE).itemsize
+
+# a program file holds a header of its magic, format version, flags (unused),
+# then the same as a shared memory block but little endian, with every page
+# in full so that they can be mapped straight into memory
+FILE_MAGIC = b"ICPG"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHqqq")
+
+
+class ProgramImage:
+    """
+    A program loaded once, and shared read-only by every Computer made from
+    it. Each computer starts with a copy-on-write copy of the image's pages,
+    so it holds private copies of only the pages it writes to: memory use is
+    the program size plus the pages each computer dirties, rather than the
+    program size for every computer.
+
+    An image can be copied into shared memory, and worker processes attach()
+    to it to share the same pages instead of each loading the program.
+
+    An image can also be saved to a program file, which load() maps into
+    memory rather than parsing, so loading takes the same time for a program
+    of any size.
+
+    An image made by specialize() starts part way through the program, so
+    computers made from it start at its pos and relative_base.
+    """
+
+    def __init__(self, program: Iterable[int] = ()):
+        self.memory = PagedMemory(program)
+        self.pos = 0
+        self.relative_base = 0
+        # outputs made on the way to pos, which computers made from the image
+        # don't repeat. Not kept in shared memory.
+        self.outputs: Tuple[int, ...] = ()
+        self.shm: Optional["SharedMemory"] = None
+        # the program file mapped by load()
+        self.file_map: Optional[mmap.mmap] = None
+        # the image's hash, worked out by computer.cache.program_hash() when
+        # first needed. Images aren't changed once they are made.
+        self.sha256: Optional[bytes] = None
+
+    def __getstate__(self):
+        # for sending to another process: pages mapped from a program file
+        # or shared memory are copied into arrays, as they can't be pickled
+        state = dict(self.__dict__)
+        memory = PagedMemory()
+        memory.pages = {
+            index: array(PAGE_TYPECODE, page) if isinstance(page, memoryview) else page
+            for index, page in self.memory.pages.items()
+        }
+        memory.shared = set(memory.pages)
+        memory.length = self.memory.length
+        state.update(memory=memory, shm=None, file_map=None)
+        return state
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def new_memory(self) -> PagedMemory:
+        """Memory for a new computer, sharing the image's pages."""
+        return self.memory.copy()
+
+    def to_shared_memory(self) -> "SharedMemory":
+        """
+        Copies the image into a new shared memory block, whose name can be
+        passed to attach() in other processes. The caller owns the block, and
+        must close() and unlink() it once they are done with it.
+
+        Raises OverflowError if the program holds values which don't fit in
+        int64, and ImportError before Python 3.8, which has no shared memory.
+        """
+        from multiprocessing import shared_memory
+
+        self.check_int64()
+        length = len(self.memory)
+        page_count = -(-length // PAGE_SIZE)
+        shm = shared_memory.SharedMemory(
+            create=True, size=HEADER.size + max(page_count, 1) * PAGE_SIZE * CELL_SIZE
+        )
+        buf = shm.buf
+        assert buf is not None
+        HEADER.pack_into(buf, 0, length, self.pos, self.relative_base)
+        for addr, view in self.memory.views():
+            start = HEADER.size + addr * CELL_SIZE
+            buf[start : start + PAGE_SIZE * CELL_SIZE] = view.cast("B")
+        return shm
+
+    @classmethod
+    def attach(cls, name: str) -> "ProgramImage":
+        """
+        Returns the image in the shared memory block called name, made by
+        to_shared_memory(). Its pages are read-only views of the block, so
+        the block must stay open while any computer made from it is in use.
+        """
+        from multiprocessing import shared_memory
+
+        try:
+            # the block belongs to whoever created it, so it mustn't be
+            # cleaned up when this process exits
+            shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+
+        buf = shm.buf
+        assert buf is not None
+        length, pos, relative_base = HEADER.unpack_from(buf)
+        image = cls()
+        # the same format as PAGE_TYPECODE
+        image.map_pages(buf.toreadonly()[HEADER.size :].cast("q"), length)
+        image.pos = pos
+        image.relative_base = relative_base
+        image.shm = shm
+        return image
+
+    def map_pages(self, cells: memoryview, length: int):
+        """Uses views of length cells, which must be read-only, as the image's
+        pages."""
+        for index in range(-(-length // PAGE_SIZE)):
+            page = cells[index * PAGE_SIZE : (index + 1) * PAGE_SIZE]
+            self.memory.pages[index] = page
+        self.memory.shared.update(self.memory.pages)
+        self.memory.length = length
+
+    def check_int64(self):
+        if any(isinstance(page, list) for page in self.memory.pages.values()):
+            raise OverflowError("program holds values which don't fit in int64")
+
+    def save(self, path: str):
+        """
+        Writes the image to a program file at path, replacing it atomically.
+        Raises OverflowError if the program holds values which don't fit in
+        int64.
+        """
+        self.check_int64()
+        atomic_write(path, self.file_chunks())
+
+    def file_chunks(self) -> Iterator[Union[bytes, memoryview]]:
+        length = len(self.memory)
+        yield FILE_HEADER.pack(
+            FILE_MAGIC, FILE_VERSION, 0, length, self.pos, self.relative_base
+        )
+        views = dict(self.memory.views())
+        for index in range(-(-length // PAGE_SIZE)):
+            view = views.get(index << PAGE_SHIFT)
+            if view is None:
+                yield bytes(PAGE_SIZE * CELL_SIZE)
+            elif sys.byteorder == "big":
+                swapped = array(PAGE_TYPECODE, view.tobytes())
+                swapped.byteswap()
+                yield memoryview(swapped)
+            else:
+                yield view
+
+    @classmethod
+    def load(cls, path: str) -> "ProgramImage":
+        """
+        Returns the image in the program file at path, written by save().
+        The file is mapped into memory, and the image's pages are read-only
+        views of it. Raises ValueError if it isn't a program file.
+        """
+        with open(path, "rb") as f:
+            file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(file_map) < FILE_HEADER.size:
+            raise ValueError(f"{path} is not a program file")
+        magic, version, flags, length, pos, relative_base = FILE_HEADER.unpack_from(
+            file_map
+        )
+        page_count = -(-length // PAGE_SIZE)
+        if (
+            magic != FILE_MAGIC
+            or version != FILE_VERSION
+            or len(file_map) != FILE_HEADER.size + page_count * PAGE_SIZE * CELL_SIZE
+        ):
+            raise ValueError(f"{path} is not a program file, or is truncated")
+
+        image = cls()
+        cells = memoryview(file_map)[FILE_HEADER.size :]
+        if sys.byteorder == "little":
+            image.map_pages(cells.cast("q"), length)
+            image.file_map = file_map
+        else:
+            values = array(PAGE_TYPECODE, cells.tobytes())
+            values.byteswap()
+            image.memory = PagedMemory(values[:length])
+        image.pos = pos
+        image.relative_base = relative_base
+        return image
@@ -0,0 +1,174 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, MutableSequence, Set, Tuple, Union
+
+PAGE_SHIFT = 10
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+
+# pages are contiguous buffers of signed 64 bit ints, until they need to hold a
+# value which doesn't fit in one
+PAGE_TYPECODE = "q"
+ZERO_PAGE = array(PAGE_TYPECODE, bytes(PAGE_SIZE * array(PAGE_TYPECODE).itemsize))
+
+# pages of a program image in shared memory are read-only memoryviews, which
+# are copied like any other shared page before they are written
+Page = Union[MutableSequence[int], memoryview]
+
+
+def new_page(values: Iterable[int] = ZERO_PAGE) -> Page:
+    """
+    Makes an int64 page holding values, or a list of Python ints if any of
+    them are too big for int64.
+    """
+    try:
+        return array(PAGE_TYPECODE, values)
+    except OverflowError:
+        return list(values)
+
+
+def copy_page(page: Page) -> Page:
+    if isinstance(page, memoryview):
+        return array(PAGE_TYPECODE, page.tobytes())
+    return page[:]
+
+
+class PagedMemory:
+    """
+    Sparse memory for an Intcode computer. Memory is split into fixed-size
+    pages which are only allocated (zeroed) when a cell in them is written,
+    so any non-negative address can be used without a memory limit. Reading a
+    cell in a page which was never written returns 0 without allocating it.
+
+    Each page is an array of int64, which takes 8 bytes a cell and copies with
+    a memcpy. Intcode needs arbitrary precision though, so a page is promoted
+    to a list of Python ints when a value which overflows int64 is written to
+    it.
+
+    copy() is copy-on-write: the copy shares every page with the original,
+    and whichever of them writes to a shared page first makes its own copy of
+    that page.
+
+    len() is one past the highest address written so far (including the
+    loaded program), and iterating yields every cell below that address.
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.pages: Dict[int, Page] = {}
+        # indexes of pages which may be shared with a copy
+        self.shared: Set[int] = set()
+        self.length = 0
+        self.load(list(values))
+
+    def load(self, values: List[int], start: int = 0):
+        """Writes values to memory, starting at address start."""
+        for offset in range(0, len(values), PAGE_SIZE):
+            chunk = values[offset : offset + PAGE_SIZE]
+            addr = start + offset
+            if addr & PAGE_MASK == 0 and len(chunk) == PAGE_SIZE:
+                self.pages[addr >> PAGE_SHIFT] = new_page(chunk)
+                self.length = max(self.length, addr + PAGE_SIZE)
+            else:
+                for n, value in enumerate(chunk):
+                    self[addr + n] = value
+
+    def __getitem__(self, addr: int) -> int:
+        page = self.pages.get(addr >> PAGE_SHIFT)
+        if page is None:
+            if addr < 0:
+                raise IndexError(f"negative address: {addr}")
+            return 0
+        return page[addr & PAGE_MASK]
+
+    def __setitem__(self, addr: int, value: int):
+        index = addr >> PAGE_SHIFT
+        page = self.pages.get(index)
+        if page is None:
+            if addr < 0:
+                raise IndexError(f"negative address: {addr}")
+            page = self.pages[index] = new_page()
+        elif index in self.shared:
+            page = self.pages[index] = copy_page(page)
+            self.shared.discard(index)
+        try:
+            page[addr & PAGE_MASK] = value
+        except OverflowError:
+            page = self.pages[index] = list(page)
+            page[addr & PAGE_MASK] = value
+        if addr >= self.length:
+            self.length = addr + 1
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[int]:
+        for addr in range(self.length):
+            yield self[addr]
+
+    def tolist(self) -> List[int]:
+        return list(self)
+
+    def copy(self) -> "PagedMemory":
+        copy = PagedMemory()
+        copy.pages = dict(self.pages)
+        self.shared.update(self.pages)
+        copy.shared = set(self.pages)
+        copy.length = self.length
+        return copy
+
+    __copy__ = copy
+
+    def views(self) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Yields (address, view) for each allocated int64 page in address order,
+        where view is a zero-copy memoryview of the page's cells starting at
+        address. Pages promoted to hold big integers are skipped.
+
+        Views are for reading: writing through one bypasses copy-on-write.
+        """
+        for index in sorted(self.pages):
+            page = self.pages[index]
+            if isinstance(page, array):
+                yield index << PAGE_SHIFT, memoryview(page)
+            elif isinstance(page, memoryview):
+                yield index << PAGE_SHIFT, page
+
+    def changed_pages(self, other: "PagedMemory") -> Set[int]:
+        """
+        Indexes of the pages which may differ between this memory and other.
+        Pages still shared since one was copied from the other are the same.
+        """
+        indexes = self.pages.keys() | other.pages.keys()
+        return {i for i in indexes if self.pages.get(i) is not other.pages.get(i)}
+
+    def changed_cells(self, other: "PagedMemory") -> Iterator[int]:
+        """Addresses of the cells which differ between this memory and other."""
+        for index in sorted(self.changed_pages(other)):
+            mine, theirs = self.pages.get(index), other.pages.get(index)
+            start = index << PAGE_SHIFT
+            if mine is None or theirs is None:
+                page = mine if mine is not None else theirs
+                assert page is not None
+                yield from (start + n for n, value in enumerate(page) if value)
+            else:
+                yield from (
+                    start + n for n, (a, b) in enumerate(zip(mine, theirs)) if a != b
+                )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the cells in allocated pages, in bytes."""
+        total = 0
+        for page in self.pages.values():
+            if isinstance(page, (array, memoryview)):
+                total += page.itemsize * len(page)
+            else:
+                total += sum(value.__sizeof__() for value in page) + 8 * len(page)
+        return total
+
+    def __eq__(self, value):
+        if isinstance(value, (PagedMemory, list, tuple)):
+            return len(self) == len(value) and all(a == b for a, b in zip(self, value))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PagedMemory({self.tolist()})"
@@ -0,0 +1,158 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+import os
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    Union,
+)
+
+from .computer import Computer, RunResult
+from .image import ProgramImage
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+# how many tasks each worker has queued up, so that they never go idle but
+# an early stop doesn't leave much work to throw away
+TASKS_PER_WORKER = 4
+
+
+class SweepResult(NamedTuple):
+    # position of the run in the sweep's input sets
+    run_index: int
+    outputs: List[int]
+    result: RunResult
+    # the values at the addresses asked for, after the run
+    memory: Dict[int, int]
+
+
+class SweepCase(NamedTuple):
+    run_index: int
+    inputs: Sequence[int]
+    patch: Dict[int, int]
+
+
+# set in each worker process by init_worker(), so that the program is sent
+# to each worker once rather than with every task
+worker_program = ProgramImage()
+worker_computer_class: Type[Computer] = Computer
+worker_read: Sequence[int] = ()
+
+
+def init_worker(
+    program: Union[ProgramImage, str],
+    computer_class: Type[Computer],
+    read: Sequence[int],
+):
+    """program is an image, or the name of an image in shared memory."""
+    global worker_program, worker_computer_class, worker_read
+    if isinstance(program, str):
+        program = ProgramImage.attach(program)
+    worker_program = program
+    worker_computer_class = computer_class
+    worker_read = read
+
+
+def run_cases(cases: List[SweepCase]) -> List[SweepResult]:
+    results = []
+    for case in cases:
+        c = worker_computer_class(worker_program, inputs=list(case.inputs))
+        for addr, value in case.patch.items():
+            c.memory[addr] = value
+        outputs, result = c.run()
+        memory = {addr: c.memory[addr] for addr in worker_read}
+        results.append(SweepResult(case.run_index, outputs, result, memory))
+    return results
+
+
+def sweep(
+    program: Union[List[int], ProgramImage],
+    input_sets: Optional[Sequence[Sequence[int]]] = None,
+    patches: Optional[Sequence[Dict[int, int]]] = None,
+    workers: Optional[int] = None,
+    read: Sequence[int] = (),
+    stop: Optional[Callable[[SweepResult], bool]] = None,
+    chunksize: int = 1,
+    computer_class: Type[Computer] = Computer,
+) -> Iterator[SweepResult]:
+    """
+    Runs program to completion once for each set of inputs, over a pool of
+    worker processes, and yields a SweepResult for each run as it completes
+    (so not necessarily in order). The program is put in shared memory for
+    the workers to attach to, unless it holds values too big for int64 or
+    shared memory isn't available, in which case it is sent to each of them.
+
+    patches gives the memory cells to set before each run, e.g.
+    [{1: noun, 2: verb}, ...] for Day 2, and read the addresses whose values
+    are reported after each run. Either of input_sets or patches can be left
+    out. Runs are sent to the workers chunksize at a time.
+
+    If stop is given, the sweep ends after yielding the first result it
+    returns True for, and runs which haven't started are cancelled. With
+    workers=0 every run happens in this process, one after another.
+    """
+    if input_sets is None and patches is None:
+        raise ValueError("Must pass either input_sets or patches")
+    count = len(input_sets) if input_sets is not None else len(patches or ())
+    cases = [
+        SweepCase(
+            n,
+            input_sets[n] if input_sets is not None else (),
+            patches[n] if patches is not None else {},
+        )
+        for n in range(count)
+    ]
+    chunks = [cases[n : n + chunksize] for n in range(0, count, chunksize)]
+    image = program if isinstance(program, ProgramImage) else ProgramImage(program)
+
+    if workers == 0:
+        init_worker(image, computer_class, tuple(read))
+        for chunk in chunks:
+            for result in run_cases(chunk):
+                yield result
+                if stop is not None and stop(result):
+                    return
+        return
+
+    shm: Optional["SharedMemory"] = None
+    try:
+        shm = image.to_shared_memory()
+    except (OverflowError, ImportError):
+        # too big for int64, or no shared memory before Python 3.8
+        pass
+    init_args = (shm.name if shm else image, computer_class, tuple(read))
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=init_args)
+    pending: Set["Future[List[SweepResult]]"] = set()
+    remaining = iter(chunks)
+    try:
+        while True:
+            # keep the workers fed
+            for chunk in islice(remaining, workers * TASKS_PER_WORKER - len(pending)):
+                pending.add(executor.submit(run_cases, chunk))
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    yield result
+                    if stop is not None and stop(result):
+                        return
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Type, Union
+
+from .computer import Computer, Snapshot
+from .image import ProgramImage
+
+if TYPE_CHECKING:
+    from .tracing import Tracer
+
+
+class ComputerPool:
+    """
+    Hands out computers which all start from the same program, and takes
+    them back to be reused. A computer coming back is reset to the program by
+    sharing the image's pages again in place of just the pages it wrote to,
+    so nothing is copied; instructions it decoded (or compiled) from pages it
+    didn't write to are kept for the next run.
+    """
+
+    def __init__(
+        self,
+        program: Union[List[int], ProgramImage],
+        computer_class: Type[Computer] = Computer,
+    ):
+        self.image = (
+            program if isinstance(program, ProgramImage) else ProgramImage(program)
+        )
+        self.computer_class = computer_class
+        # the state every computer is reset to
+        self.pristine = Snapshot(
+            self.image.memory, self.image.pos, self.image.relative_base, (), False, 0
+        )
+        self.free: List[Computer] = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(
+        self,
+        inputs=None,
+        tracer: Optional["Tracer"] = None,
+        input_fn: Optional[Callable[[], Optional[int]]] = None,
+        output_fn: Optional[Callable[[int], None]] = None,
+    ) -> Computer:
+        """A computer at the start of the program, as if it were new."""
+        if not self.free:
+            self.created += 1
+            return self.computer_class(self.image, inputs, tracer, input_fn, output_fn)
+
+        self.reused += 1
+        c = self.free.pop()
+        c.tracer = tracer
+        c.input_fn = input_fn
+        c.output_fn = output_fn
+        if isinstance(inputs, int):
+            c.add_input(inputs)
+        elif inputs:
+            c.add_inputs(inputs)
+        return c
+
+    def release(self, c: Computer):
+        """Takes back a computer from acquire(), which mustn't be used after."""
+        c.restore(self.pristine)
+        c.tracer = c.input_fn = c.output_fn = None
+        c.output = []
+        self.free.append(c)
+
+    @contextmanager
+    def computer(self, *args, **kwargs) -> Iterator[Computer]:
+        """acquire() as a context manager, which releases the computer after."""
+        c = self.acquire(*args, **kwargs)
+        try:
+            yield c
+        finally:
+            self.release(c)
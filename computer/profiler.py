@@ -0,0 +1,101 @@
+from collections import Counter
+import json
+import time
+from typing import Any, Dict, Optional
+
+from .computer import OP_NAMES, Instruction, RunResult
+from .tracing import Tracer
+
+
+class Profiler(Tracer):
+    """
+    Profiles a computer: instructions run per opcode and per address, time
+    spent running versus blocked on input between runs, the memory high-water
+    mark and the number of calls to run(). Attach it like any other tracer,
+    e.g. Computer(program, tracer=Profiler()).
+
+    Profiling runs the traced interpreter, so a CompiledComputer is profiled
+    as if it were interpreted.
+    """
+
+    def __init__(self):
+        self.opcodes: Counter = Counter()
+        self.addresses: Counter = Counter()
+        # the opcode last seen at each address, for the hotspot table
+        self.opcode_at: Dict[int, int] = {}
+        self.runs = 0
+        self.inputs = 0
+        self.outputs = 0
+        self.running_time = 0.0
+        self.blocked_time = 0.0
+        # highest len(memory) seen, in cells, and pages allocated then
+        self.memory_high_water = 0
+        self.pages_high_water = 0
+
+        self.run_started: Optional[float] = None
+        self.blocked_since: Optional[float] = None
+
+    def on_run_start(self, computer):
+        now = time.perf_counter()
+        self.runs += 1
+        if self.blocked_since is not None:
+            self.blocked_time += now - self.blocked_since
+            self.blocked_since = None
+        self.run_started = now
+
+    def on_run_end(self, computer, result):
+        now = time.perf_counter()
+        if self.run_started is not None:
+            self.running_time += now - self.run_started
+            self.run_started = None
+        if result == RunResult.BLOCK_ON_INPUT:
+            self.blocked_since = now
+        self.memory_high_water = max(self.memory_high_water, len(computer.memory))
+        self.pages_high_water = max(self.pages_high_water, len(computer.memory.pages))
+
+    def on_instruction(self, computer, pos, instruction: Instruction):
+        self.opcodes[instruction.opcode] += 1
+        self.addresses[pos] += 1
+        self.opcode_at[pos] = instruction.opcode
+
+    def on_input(self, computer, value):
+        self.inputs += 1
+
+    def on_output(self, computer, value):
+        self.outputs += 1
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.opcodes.values())
+
+    def report(self) -> Dict[str, Any]:
+        """The profile as a dict of plain values, ready for JSON."""
+        return {
+            "instructions": self.instructions,
+            "runs": self.runs,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "running_seconds": self.running_time,
+            "blocked_seconds": self.blocked_time,
+            "memory_high_water": self.memory_high_water,
+            "pages_high_water": self.pages_high_water,
+            "opcodes": {
+                OP_NAMES[op]: count for op, count in self.opcodes.most_common()
+            },
+            # JSON keys are strings
+            "addresses": {
+                str(addr): count for addr, count in self.addresses.most_common()
+            },
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.report(), **kwargs)
+
+    def hotspots(self, limit: int = 20) -> str:
+        """A table of the addresses which ran the most instructions."""
+        total = self.instructions or 1
+        lines = [f"{'address':>8} {'op':<22} {'count':>12} {'%':>6}"]
+        for addr, count in self.addresses.most_common(limit):
+            op = OP_NAMES[self.opcode_at[addr]]
+            lines.append(f"{addr:>8} {op:<22} {count:>12} {100 * count / total:>6.2f}")
+        return "\n".join(lines)
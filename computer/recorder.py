@@ -0,0 +1,245 @@
+from enum import Enum
+import mmap
+import struct
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from .computer import Computer, RunResult
+from .tracing import Tracer
+
+# A trace file is a header, then one record per event:
+#
+#   header: magic, format version (uint16) and flags (uint16)
+#   record: a varint holding the zigzag encoded value << 2 | the event kind
+#
+# Inputs, outputs and pcs are each stored as the difference from the last
+# value of the same kind, so that a pc moving on by an instruction's length,
+# or a run of similar inputs, takes one byte. The end of a run stores its
+# RunResult's value instead.
+MAGIC = b"ICTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+
+# set in the header's flags when every pc was recorded
+FLAG_PCS = 1
+
+# bytes held before writing them out
+BUFFER_SIZE = 1 << 16
+
+
+class EventKind(Enum):
+    INPUT = 0
+    OUTPUT = 1
+    PC = 2
+    RUN_END = 3
+
+
+class Event(NamedTuple):
+    kind: EventKind
+    value: int
+
+
+class TraceError(ValueError):
+    """Raised for a trace which is corrupt or in an unknown format, or which a
+    replay doesn't match."""
+
+
+def zigzag(n: int) -> int:
+    # so that small negative numbers stay small
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def unzigzag(n: int) -> int:
+    return n >> 1 if n & 1 == 0 else -((n + 1) >> 1)
+
+
+class TraceRecorder(Tracer):
+    """
+    Records every input and output of a computer, the end of every run and
+    optionally the address of every instruction, to a trace file which
+    TraceReader can read back and replay() can run again.
+
+    Use it as a context manager, or close() it, so the end of the trace is
+    written out.
+    """
+
+    def __init__(self, path: str, pcs=False):
+        self.file: BinaryIO = open(path, "wb")
+        self.pcs = pcs
+        self.file.write(HEADER.pack(MAGIC, VERSION, FLAG_PCS if pcs else 0))
+        self.buffer = bytearray()
+        # the last value recorded of each kind
+        self.last = {kind: 0 for kind in EventKind}
+        # the pc of the instruction being run, which isn't recorded until it
+        # is known not to have blocked on input
+        self.pending_pc: Optional[int] = None
+
+    def record(self, kind: EventKind, value: int):
+        if kind == EventKind.RUN_END:
+            n = zigzag(value)
+        else:
+            n = zigzag(value - self.last[kind])
+            self.last[kind] = value
+        n = n << 2 | kind.value
+        out = self.buffer
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+        if len(out) >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def record_pending_pc(self):
+        if self.pending_pc is not None:
+            self.record(EventKind.PC, self.pending_pc)
+            self.pending_pc = None
+
+    def close(self):
+        if not self.file.closed:
+            self.record_pending_pc()
+            self.flush()
+            self.file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def on_instruction(self, computer, pos, instruction):
+        if self.pcs:
+            self.record_pending_pc()
+            self.pending_pc = pos
+
+    def on_input(self, computer, value):
+        self.record_pending_pc()
+        self.record(EventKind.INPUT, value)
+
+    def on_output(self, computer, value):
+        self.record_pending_pc()
+        self.record(EventKind.OUTPUT, value)
+
+    def on_run_end(self, computer, result):
+        if result == RunResult.BLOCK_ON_INPUT:
+            # the input instruction didn't run, and will be run again
+            self.pending_pc = None
+        self.record_pending_pc()
+        self.record(EventKind.RUN_END, result.value)
+
+
+class TraceReader:
+    """
+    Reads a trace file written by TraceRecorder. The file is mapped into
+    memory rather than read, so a trace of any size can be iterated over.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise TraceError("trace is truncated")
+        magic, version, flags = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise TraceError(f"not a trace, or an unknown version: {magic!r} {version}")
+        self.has_pcs = bool(flags & FLAG_PCS)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self) -> Iterator[Event]:
+        data = self.map
+        end = len(data)
+        pos = HEADER.size
+        last = {kind: 0 for kind in EventKind}
+        kinds = list(EventKind)
+        while pos < end:
+            n = shift = 0
+            while True:
+                if pos >= end:
+                    raise TraceError("trace ends part way through a record")
+                byte = data[pos]
+                pos += 1
+                n |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            kind = kinds[n & 3]
+            value = unzigzag(n >> 2)
+            if kind != EventKind.RUN_END:
+                value += last[kind]
+                last[kind] = value
+            yield Event(kind, value)
+
+    def values(self, kind: EventKind) -> Iterator[int]:
+        return (event.value for event in self if event.kind == kind)
+
+    def inputs(self) -> List[int]:
+        return list(self.values(EventKind.INPUT))
+
+    def outputs(self) -> List[int]:
+        return list(self.values(EventKind.OUTPUT))
+
+
+class PcChecker(Tracer):
+    """Checks that a replay runs the same instructions as were recorded."""
+
+    def __init__(self, pcs: Iterator[int]):
+        self.pcs = pcs
+        self.count = 0
+
+    def on_instruction(self, computer, pos, instruction):
+        recorded = next(self.pcs, None)
+        if recorded is None and instruction.opcode == 3:
+            # blocking once the recorded inputs have run out
+            return
+        if recorded != pos:
+            raise TraceError(
+                f"instruction {self.count} ran at {pos}, but was recorded at {recorded}"
+            )
+        self.count += 1
+
+
+def replay(
+    path: str, computer: Computer, check_pcs=True
+) -> Tuple[List[int], RunResult]:
+    """
+    Runs computer on the inputs recorded in the trace at path, in place of
+    whatever supplied them when it was recorded, until it halts or the
+    recorded inputs run out. Raises TraceError if it outputs anything other
+    than what was recorded, or if check_pcs is set and the trace has pcs,
+    runs any other instruction. The computer's input_fn, output_fn and
+    tracer are put back afterwards.
+    """
+    input_fn, output_fn, tracer = computer.input_fn, computer.output_fn, computer.tracer
+    with TraceReader(path) as reader:
+        inputs = reader.values(EventKind.INPUT)
+        computer.input_fn = lambda: next(inputs, None)
+        computer.output_fn = None
+        if check_pcs and reader.has_pcs:
+            computer.tracer = PcChecker(reader.values(EventKind.PC))
+        try:
+            outputs, result = computer.run(until_blocked=True)
+        finally:
+            computer.input_fn, computer.output_fn = input_fn, output_fn
+            computer.tracer = tracer
+        recorded = reader.outputs()
+
+    for n, (value, expected) in enumerate(zip(outputs, recorded)):
+        if value != expected:
+            raise TraceError(f"output {n} was {value}, but {expected} was recorded")
+    if len(outputs) != len(recorded):
+        raise TraceError(
+            f"{len(outputs)} outputs were made, but {len(recorded)} were recorded"
+        )
+    return outputs, result
@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Deque, Dict, List, Set
+import time
+
+from .computer import Computer, RunResult
+
+# instructions a computer runs before the next one gets a turn
+DEFAULT_SLICE = 1000
+
+
+class Scheduler:
+    """
+    Runs many computers cooperatively on one thread. Computers which can make
+    progress wait their turn in a ready queue, and each turn runs for at most
+    slice_size instructions so that one busy computer can't starve the rest.
+
+    A computer which blocks on input is parked, and costs nothing until
+    send() gives it an input, which puts it back in the ready queue. Wire
+    computers together with connect(), so that one's outputs are sent to
+    another. Outputs of computers which aren't connected are collected in
+    outputs.
+    """
+
+    def __init__(self, slice_size: int = DEFAULT_SLICE):
+        self.slice_size = slice_size
+        self.computers: List[Computer] = []
+        self.ready: Deque[Computer] = deque()
+        self.parked: Set[Computer] = set()
+        self.outputs: Dict[Computer, List[int]] = {}
+
+        # throughput counters
+        self.slices = 0
+        self.instructions_executed = 0
+        self.wakeups = 0
+        self.elapsed = 0.0
+
+    def add(self, computer: Computer) -> Computer:
+        self.computers.append(computer)
+        if not computer.halted:
+            self.ready.append(computer)
+        return computer
+
+    def connect(self, source: Computer, dest: Computer):
+        """Sends every output of source to dest as input."""
+        source.output_fn = lambda value: self.send(dest, value)
+
+    def send(self, dest: Computer, value: int):
+        dest.add_input(value)
+        if dest in self.parked:
+            self.parked.remove(dest)
+            self.ready.append(dest)
+            self.wakeups += 1
+
+    def run(self):
+        """
+        Runs computers until none of them are ready, i.e. each one has either
+        halted or is parked waiting for input.
+        """
+        start = time.perf_counter()
+        try:
+            while self.ready:
+                computer = self.ready.popleft()
+                executed = computer.instructions_executed
+                outputs, result = computer.run(
+                    until_blocked=True, max_instructions=self.slice_size
+                )
+                self.slices += 1
+                self.instructions_executed += computer.instructions_executed - executed
+                if outputs:
+                    self.outputs.setdefault(computer, []).extend(outputs)
+
+                if result == RunResult.HALTED:
+                    continue
+                if result == RunResult.BLOCK_ON_INPUT and not computer.input_queue:
+                    self.parked.add(computer)
+                else:
+                    self.ready.append(computer)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    @property
+    def halted(self) -> bool:
+        return all(c.halted for c in self.computers)
+
+    @property
+    def instructions_per_second(self) -> float:
+        return self.instructions_executed / self.elapsed if self.elapsed else 0.0
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import List, Sequence, Type, Union
+
+from .cache import DEFAULT_MAXSIZE, digest
+from .computer import Computer, RunResult
+from .image import ProgramImage
+
+
+def specialize(
+    program: Union[List[int], ProgramImage],
+    known_inputs: Sequence[int],
+    computer_class: Type[Computer] = Computer,
+) -> ProgramImage:
+    """
+    Runs program on known_inputs until it needs an input which isn't known,
+    and returns the state it is left in as a new image. Computers made from
+    the image carry on from there, so only need the inputs which come after
+    known_inputs.
+
+    Raises ValueError if the program halts before needing any more input.
+    """
+    c = computer_class(program, inputs=list(known_inputs))
+    outputs, result = c.run(until_blocked=True)
+    if result == RunResult.HALTED:
+        raise ValueError("Program halted on its known inputs")
+
+    image = ProgramImage()
+    image.memory = c.memory.copy()
+    image.pos = c.pos
+    image.relative_base = c.relative_base
+    image.outputs = tuple(outputs)
+    return image
+
+
+class Specializer:
+    """
+    Specializes programs on their known leading inputs, keeping the images
+    made for the most recently used (program, inputs) pairs so that each
+    prologue is only ever run once.
+    """
+
+    def __init__(
+        self, maxsize: int = DEFAULT_MAXSIZE, computer_class: Type[Computer] = Computer
+    ):
+        self.maxsize = maxsize
+        self.computer_class = computer_class
+        self.images: "OrderedDict[str, ProgramImage]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def specialize(
+        self, program: Union[List[int], ProgramImage], known_inputs: Sequence[int]
+    ) -> ProgramImage:
+        key = digest(program, known_inputs)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+        self.misses += 1
+        image = specialize(program, known_inputs, self.computer_class)
+        self.images[key] = image
+        while len(self.images) > self.maxsize:
+            self.images.popitem(last=False)
+        return image
+
+    def clear(self):
+        self.images.clear()
@@ -0,0 +1,427 @@
+from collections import deque
+from itertools import product
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .computer import Computer, ParamMode, RunResult
+
+
+class SymbolicError(ValueError):
+    """Raised when a run depends on a symbol in a way which can't be followed."""
+
+
+class Symbol(NamedTuple):
+    """An unknown integer, somewhere from low to high inclusive."""
+
+    name: str
+    low: int
+    high: int
+
+    def __str__(self):
+        return self.name
+
+
+class Comparison(NamedTuple):
+    """1 if left < right (opcode 7) or left == right (opcode 8), else 0."""
+
+    opcode: int
+    left: "Expr"
+    right: "Expr"
+
+    def __str__(self):
+        return f"({self.left} {'<' if self.opcode == 7 else '=='} {self.right})"
+
+
+class Unknown(NamedTuple):
+    """The value of a cell read through an address which depends on symbols."""
+
+    addr: "Expr"
+
+    def __str__(self):
+        return f"m[{self.addr}]"
+
+
+Atom = Union[Symbol, Comparison, Unknown]
+# a product of atoms; the empty product is the constant term
+Monomial = Tuple[Atom, ...]
+
+
+def monomial(atoms: Iterable[Atom]) -> Monomial:
+    # sorted, so that equal products are equal tuples
+    return tuple(sorted(atoms, key=repr))
+
+
+class Expr:
+    """
+    A polynomial with integer coefficients over symbols, comparisons and
+    unknown reads. Every value in a symbolic run's memory is one of these.
+    """
+
+    def __init__(self, terms: Optional[Dict[Monomial, int]] = None):
+        self.terms = {m: c for m, c in (terms or {}).items() if c != 0}
+
+    @classmethod
+    def of(cls, value: Union[int, Atom]) -> "Expr":
+        if isinstance(value, int):
+            return cls({(): value})
+        return cls({(value,): 1})
+
+    @property
+    def value(self) -> Optional[int]:
+        """The expression's value, if it doesn't depend on any symbol."""
+        if not self.terms:
+            return 0
+        if len(self.terms) == 1 and () in self.terms:
+            return self.terms[()]
+        return None
+
+    def __add__(self, other: "Expr") -> "Expr":
+        terms = dict(self.terms)
+        for m, c in other.terms.items():
+            terms[m] = terms.get(m, 0) + c
+        return Expr(terms)
+
+    def __mul__(self, other: "Expr") -> "Expr":
+        terms: Dict[Monomial, int] = {}
+        for m1, c1 in self.terms.items():
+            for m2, c2 in other.terms.items():
+                m = monomial(m1 + m2)
+                terms[m] = terms.get(m, 0) + c1 * c2
+        return Expr(terms)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Expr) and self.terms == other.terms
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.terms.items()))
+
+    def __str__(self):
+        if not self.terms:
+            return "0"
+        parts = []
+        for m, c in sorted(self.terms.items(), key=lambda t: (-len(t[0]), repr(t))):
+            factors = [str(a) for a in m]
+            if c != 1 or not factors:
+                factors.insert(0, str(c))
+            parts.append("*".join(factors))
+        return " + ".join(parts)
+
+    def __repr__(self):
+        return f"Expr({self})"
+
+    def symbols(self) -> Set[Symbol]:
+        """Every symbol the expression depends on, however indirectly."""
+        found: Set[Symbol] = set()
+        for m in self.terms:
+            for atom in m:
+                if isinstance(atom, Symbol):
+                    found.add(atom)
+                elif isinstance(atom, Comparison):
+                    found |= atom.left.symbols() | atom.right.symbols()
+                else:
+                    found |= atom.addr.symbols()
+        return found
+
+    def has_unknowns(self) -> bool:
+        return any(
+            isinstance(atom, Unknown)
+            or (
+                isinstance(atom, Comparison)
+                and (atom.left.has_unknowns() or atom.right.has_unknowns())
+            )
+            for m in self.terms
+            for atom in m
+        )
+
+    def linear_in(self, symbol: Symbol) -> bool:
+        """True if the expression is a * symbol + b, where a and b don't
+        depend on symbol."""
+        for m in self.terms:
+            if m.count(symbol) > 1:
+                return False
+            for atom in m:
+                if not isinstance(atom, Symbol) and symbol in Expr.of(atom).symbols():
+                    return False
+        return True
+
+    def evaluate(self, assignment: Dict[str, int]) -> int:
+        """The expression's value, given a value for every symbol in it."""
+        total = 0
+        for m, c in self.terms.items():
+            for atom in m:
+                c *= evaluate_atom(atom, assignment)
+            total += c
+        return total
+
+
+def evaluate_atom(atom: Atom, assignment: Dict[str, int]) -> int:
+    if isinstance(atom, Symbol):
+        return assignment[atom.name]
+    if isinstance(atom, Comparison):
+        left, right = atom.left.evaluate(assignment), atom.right.evaluate(assignment)
+        return int(left < right) if atom.opcode == 7 else int(left == right)
+    raise SymbolicError(f"{atom} depends on memory which wasn't tracked")
+
+
+def constant(value: int) -> Expr:
+    return Expr.of(value)
+
+
+# that an expression is non-zero (True) or zero (False)
+Constraint = Tuple[Expr, bool]
+
+
+class Path:
+    """
+    One way through a program: the state it ends in, and the constraints
+    the symbols have to meet for a run to go this way.
+    """
+
+    def __init__(self, memory: Dict[int, Expr], inputs: Sequence[Expr]):
+        self.memory = memory
+        self.pos = 0
+        self.relative_base = 0
+        self.inputs = deque(inputs)
+        self.outputs: List[Expr] = []
+        self.constraints: List[Constraint] = []
+        self.result = RunResult.RUNNABLE
+        self.instructions_executed = 0
+        # the branch this path stopped at, left RUNNABLE, because there were
+        # already too many paths to split it
+        self.stopped_at: Optional[int] = None
+
+    def copy(self) -> "Path":
+        copy = Path(dict(self.memory), self.inputs)
+        copy.pos = self.pos
+        copy.relative_base = self.relative_base
+        copy.outputs = list(self.outputs)
+        copy.constraints = list(self.constraints)
+        copy.instructions_executed = self.instructions_executed
+        return copy
+
+    def __getitem__(self, addr: int) -> Expr:
+        return self.memory.get(addr, constant(0))
+
+    def solve(self, expr: Expr, target: int) -> Iterator[Dict[str, int]]:
+        """Every assignment of the symbols for which this path is taken and
+        expr == target."""
+        return solve(expr, target, self.constraints)
+
+
+def solve(
+    expr: Expr, target: int, constraints: Sequence[Constraint] = ()
+) -> Iterator[Dict[str, int]]:
+    """
+    Yields every assignment of the symbols, within their ranges, for which
+    expr == target and every constraint holds.
+
+    The symbol with the widest range which expr is linear in is solved for
+    directly, and the rest are searched: a target which is a linear function
+    of two symbols costs one pass over the range of the narrower one. Raises
+    SymbolicError if expr depends on unknown memory.
+    """
+    everything = [expr] + [e for e, want in constraints]
+    if any(e.has_unknowns() for e in everything):
+        raise SymbolicError(f"can't solve {expr}, it depends on unknown memory")
+    symbols = sorted(set().union(*(e.symbols() for e in everything)))
+
+    def holds(assignment: Dict[str, int]) -> bool:
+        return all((e.evaluate(assignment) != 0) == want for e, want in constraints)
+
+    linear = [s for s in symbols if expr.linear_in(s)]
+    if not linear:
+        for values in product(*(range(s.low, s.high + 1) for s in symbols)):
+            assignment = {s.name: v for s, v in zip(symbols, values)}
+            if expr.evaluate(assignment) == target and holds(assignment):
+                yield assignment
+        return
+
+    free = max(linear, key=lambda s: s.high - s.low)
+    rest = [s for s in symbols if s != free]
+    for values in product(*(range(s.low, s.high + 1) for s in rest)):
+        assignment = {s.name: v for s, v in zip(rest, values)}
+        # expr is a * free + b
+        assignment[free.name] = 0
+        b = expr.evaluate(assignment)
+        assignment[free.name] = 1
+        a = expr.evaluate(assignment) - b
+        if a == 0:
+            candidates: Iterable[int] = (
+                range(free.low, free.high + 1) if b == target else ()
+            )
+        elif (target - b) % a == 0 and free.low <= (target - b) // a <= free.high:
+            candidates = [(target - b) // a]
+        else:
+            candidates = ()
+        for v in candidates:
+            assignment[free.name] = v
+            if holds(assignment):
+                yield dict(assignment)
+
+
+class SymbolicComputer:
+    """
+    Runs a program in which some memory cells and inputs are symbols rather
+    than numbers. Arithmetic on symbols builds expressions, and a branch
+    which depends on symbols splits the run in two, each path recording the
+    constraint which sends it its way. The expressions left in memory or
+    output can then be solved for target values with solve(), instead of
+    searching every value of the symbols with a run each.
+
+    Symbols can't decide which instruction runs or where a write lands, so
+    a run which needs that raises SymbolicError. Reads from an address which
+    depends on symbols give an unknown value, which is fine so long as it is
+    overwritten or never used.
+    """
+
+    def __init__(
+        self,
+        program: List[int],
+        symbols: Optional[Dict[int, Symbol]] = None,
+        inputs: Sequence[Union[int, Symbol]] = (),
+    ):
+        memory = {addr: constant(v) for addr, v in enumerate(program)}
+        for addr, symbol in (symbols or {}).items():
+            memory[addr] = Expr.of(symbol)
+        self.start = Path(memory, [Expr.of(i) for i in inputs])
+        self.decoder = Computer([])
+
+    def run(self, max_instructions: int = 100000, max_paths: int = 64) -> List[Path]:
+        """
+        Follows every path through the program, returning each one once it
+        halts, blocks on input or runs max_instructions instructions (which
+        leaves it RUNNABLE). Once there are max_paths, a path which reaches
+        a branch on symbols is returned as it is, RUNNABLE with stopped_at
+        set to the branch, rather than split.
+        """
+        done: List[Path] = []
+        pending = [self.start.copy()]
+        paths = 1
+        while pending:
+            path = pending.pop()
+            while path.result == RunResult.RUNNABLE and path.stopped_at is None:
+                if path.instructions_executed >= max_instructions:
+                    break
+                other = self.step(path, split=paths < max_paths)
+                if other is not None:
+                    paths += 1
+                    pending.append(other)
+            done.append(path)
+        return done
+
+    def concrete(self, path: Path, expr: Expr, what: str) -> int:
+        value = expr.value
+        if value is None:
+            raise SymbolicError(f"{what} at {path.pos} depends on symbols: {expr}")
+        return value
+
+    def address(self, path: Path, mode: ParamMode, param: Expr) -> Expr:
+        if mode == ParamMode.RELATIVE:
+            return param + constant(path.relative_base)
+        return param
+
+    def load(self, path: Path, mode: ParamMode, param: Expr) -> Expr:
+        if mode == ParamMode.IMMEDIATE:
+            return param
+        addr = self.address(path, mode, param)
+        if addr.value is None:
+            return Expr.of(Unknown(addr))
+        if addr.value < 0:
+            raise SymbolicError(f"read from negative address {addr.value}")
+        return path[addr.value]
+
+    def store(self, path: Path, mode: ParamMode, param: Expr, value: Expr):
+        addr = self.concrete(path, self.address(path, mode, param), "write address")
+        if addr < 0:
+            raise SymbolicError(f"write to negative address {addr}")
+        path.memory[addr] = value
+
+    def step(self, path: Path, split: bool) -> Optional[Path]:
+        """Runs one instruction, returning the other side of a split branch."""
+        instruction = self.decoder.parse_instruction(
+            self.concrete(path, path[path.pos], "instruction")
+        )
+        op, modes = instruction.opcode, instruction.param_modes
+        params = [path[path.pos + n] for n in range(1, 1 + len(modes))]
+        next_pos = path.pos + 1 + len(params)
+        path.instructions_executed += 1
+
+        if op in (1, 2, 7, 8):
+            left = self.load(path, modes[0], params[0])
+            right = self.load(path, modes[1], params[1])
+            if op == 1:
+                value = left + right
+            elif op == 2:
+                value = left * right
+            elif left.value is not None and right.value is not None:
+                compare = (
+                    left.value < right.value if op == 7 else left.value == right.value
+                )
+                value = constant(int(compare))
+            else:
+                value = Expr.of(Comparison(op, left, right))
+            self.store(path, modes[2], params[2], value)
+        elif op == 3:
+            if not path.inputs:
+                path.instructions_executed -= 1
+                path.result = RunResult.BLOCK_ON_INPUT
+                return None
+            self.store(path, modes[0], params[0], path.inputs.popleft())
+        elif op == 4:
+            path.outputs.append(self.load(path, modes[0], params[0]))
+        elif op in (5, 6):
+            test = self.load(path, modes[0], params[0])
+            # the target only has to be known if the jump is taken
+            target = self.load(path, modes[1], params[1])
+            if test.value is not None:
+                if (test.value != 0) == (op == 5):
+                    path.pos = self.concrete(path, target, "jump target")
+                else:
+                    path.pos = next_pos
+                return None
+            if not split:
+                path.instructions_executed -= 1
+                path.stopped_at = path.pos
+                return None
+            taken = self.concrete(path, target, "jump target")
+            other = path.copy()
+            # the jump is taken when the test is non-zero for op 5, zero for 6
+            path.constraints.append((test, op == 5))
+            path.pos = taken
+            other.constraints.append((test, op != 5))
+            other.pos = next_pos
+            return other
+        elif op == 9:
+            step = self.load(path, modes[0], params[0])
+            path.relative_base += self.concrete(path, step, "relative base adjustment")
+        elif op == 99:
+            path.result = RunResult.HALTED
+            return None
+
+        path.pos = next_pos
+        return None
+
+
+def find_inputs(
+    program: List[int], symbols: Dict[int, Symbol], addr: int, target: int
+) -> Optional[Dict[str, int]]:
+    """
+    Finds values for the symbol cells which leave target at addr once the
+    program halts, or None if there are none.
+    """
+    for path in SymbolicComputer(program, symbols).run():
+        if path.result != RunResult.HALTED:
+            continue
+        for assignment in path.solve(path[addr], target):
+            return assignment
+    return None
@@ -0,0 +1,48 @@
+import asyncio
+
+from .aio import channel, run_async
+from .computer import Computer, parse_program
+from .example_programs import BUSY
+
+FEEDBACK_EXAMPLE = parse_program(
+    "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5"
+)
+
+
+async def feedback_loop(phases):
+    channels = [channel() for _ in phases]
+    for phase, ch in zip(phases, channels):
+        ch.put_nowait(phase)
+    channels[0].put_nowait(0)
+
+    amplifiers = [
+        run_async(Computer(FEEDBACK_EXAMPLE), channels[n], channels[(n + 1) % 5])
+        for n in range(len(phases))
+    ]
+    await asyncio.gather(*amplifiers)
+    # the last amplifier's final output is left in the first one's inbox
+    return channels[0].get_nowait()
+
+
+class TestRunAsync:
+    def test_feedback_loop(self):
+        assert asyncio.run(feedback_loop([9, 8, 7, 6, 5])) == 139629729
+
+    def test_busy_computer_yields(self):
+        busy = Computer(BUSY)
+        # output 2 as soon as there is an input
+        quick = Computer(parse_program("3,5,104,2,99,0"))
+
+        async def run():
+            inbox, outbox = channel(), channel()
+            quick_inbox = channel()
+            quick_inbox.put_nowait(0)
+            await asyncio.gather(
+                run_async(busy, inbox, outbox, slice_size=100),
+                run_async(quick, quick_inbox, outbox, slice_size=100),
+            )
+            return [outbox.get_nowait() for _ in range(outbox.qsize())]
+
+        assert asyncio.run(run()) == [2, 1]
+        assert busy.halted and quick.halted
+        assert busy.input_fn is None and busy.output_fn is None
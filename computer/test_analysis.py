@@ -0,0 +1,65 @@
+from .analysis import Analysis, format_instruction
+from .computer import Computer, parse_program
+from .example_programs import COUNTDOWN
+
+# patches the first operand of the add at addr 12, then jumps to it
+SELF_MODIFYING = parse_program("1001,23,24,13,1105,1,12,0,0,0,0,0,1001,0,0,22,4,22,99")
+
+
+class TestAnalysis:
+    def test_format_instruction(self):
+        c = Computer(parse_program("21101,4,-2,3,204,-1"))
+        assert format_instruction(0, c.decode(0)) == "    0: ADD 4, -2 -> [rb+3]"
+        assert format_instruction(4, c.decode(4)) == "    4: WRITE_OUTPUT [rb-1]"
+
+    def test_control_flow_graph(self):
+        analysis = Analysis(COUNTDOWN)
+        assert sorted(analysis.instructions) == [0, 4, 6, 9]
+        # the data at addrs 10 and 11 is never reached
+        assert sorted(analysis.blocks) == [0, 9]
+        assert analysis.blocks[0].end == 9
+        assert analysis.blocks[0].successors == [0, 9]
+        assert analysis.blocks[9].successors == []
+
+    def test_read_only(self):
+        analysis = Analysis(COUNTDOWN)
+        assert not analysis.is_self_modifying
+        assert analysis.read_only_regions() == [(0, 10)]
+
+    def test_self_modifying(self):
+        analysis = Analysis(SELF_MODIFYING)
+        # the unconditional jump skips the cells in between
+        assert sorted(analysis.blocks) == [0, 12]
+        assert analysis.self_modifying_writes == {0: 13}
+        assert analysis.read_only_regions() == [(0, 7), (12, 13), (14, 19)]
+        assert "writes into code: 1" in analysis.report()
+
+    def test_relative_writes_and_indirect_jumps(self):
+        analysis = Analysis(parse_program("109,10,21101,1,2,1,106,0,10,99,9,0"))
+        assert analysis.dynamic_writes == [2]
+        assert analysis.indirect_jumps == [6]
+        assert analysis.read_only_regions() == []
+
+    def test_code_reached_by_indirect_jump_is_unknown(self):
+        # jumps through addr 21 to an add at 22, which writes into addr 1
+        analysis = Analysis([6, 20, 21, 99] + [0] * 16 + [0, 22, 1101, 7, 7, 1, 99])
+        assert analysis.indirect_jumps == [0]
+        assert analysis.is_self_modifying
+        assert analysis.read_only_regions() == []
+
+    def test_rewritten_write_target_is_dynamic(self):
+        # the first add sets the target of the add at 12 to addr 5, and as
+        # decoded the add at 12 writes over the first add too
+        program = [1101, 0, 5, 15, 1105, 1, 12, 0, 0, 0, 0, 0, 1101, 7, 7, 0, 99]
+        analysis = Analysis(program)
+        assert analysis.dynamic_writes == [0, 12]
+        assert analysis.read_only_regions() == []
+        c = Computer(program)
+        c.run()
+        assert c.memory[5] == 14
+
+    def test_rewritten_jump_is_indirect(self):
+        # the add makes the never taken jump at 4 jump to addr 9
+        analysis = Analysis(parse_program("1101,1,0,5,1105,0,9,99,0,99"))
+        assert analysis.indirect_jumps == [4]
+        assert analysis.read_only_regions() == []
@@ -0,0 +1,74 @@
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from .batch import BatchComputer
+from .computer import Computer, RunResult, parse_program
+from .example_programs import LARGER_EXAMPLE
+
+
+class TestBatchComputer:
+    def test_same_outputs_as_computer(self):
+        # lanes take different branches, so run in separate groups
+        inputs = [[n] for n in range(12)]
+        outputs, status = BatchComputer(LARGER_EXAMPLE, inputs).run()
+        assert outputs == [Computer(LARGER_EXAMPLE, inputs=i).run()[0] for i in inputs]
+        assert (status == RunResult.HALTED.value).all()
+
+    def test_patches(self):
+        # a grid of nouns and verbs, patched in like Day 2: stores
+        # m[noun] * m[verb] + 1 to addr 0
+        program = parse_program("1,0,0,3,2,0,0,13,1,13,14,0,99,0,1")
+        nouns, verbs = np.divmod(np.arange(100), 10)
+        b = BatchComputer(program, patches={5: nouns, 6: verbs}, extra_memory=0)
+        b.run()
+        assert b.halted.all()
+        expected = []
+        for noun, verb in zip(nouns, verbs):
+            patched = list(program)
+            patched[5], patched[6] = noun, verb
+            c = Computer(patched)
+            c.run()
+            expected.append(c.memory[0])
+        assert b.memory[:, 0].tolist() == expected
+
+    def test_relative_base(self):
+        quine = parse_program(
+            "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99"
+        )
+        outputs, status = BatchComputer(quine, lanes=3).run()
+        assert outputs == [quine] * 3
+
+    def test_blocks_without_input(self):
+        b = BatchComputer(parse_program("3,9,3,9,4,9,99,0,0,0"), [[1, 2], [1]])
+        outputs, status = b.run()
+        assert outputs == [[2], []]
+        assert status.tolist() == [
+            RunResult.HALTED.value,
+            RunResult.BLOCK_ON_INPUT.value,
+        ]
+        assert b.pc.tolist() == [6, 2]
+
+    def test_self_modifying_lanes_are_split(self):
+        # lanes store their input over the opcode at addr 5, then jump to it:
+        # 104 outputs the next value, 99 halts
+        program = parse_program("3,5,1105,1,5,0,42,99")
+        outputs, status = BatchComputer(program, [[104], [99]]).run()
+        assert outputs == [[42], []]
+
+    def test_jump_target_only_read_when_taken(self):
+        # rb += input, then jump to m[rb + 12] if the input is 0. The target
+        # of a lane with a large input is out of range, but not jumped to.
+        program = [3, 20, 9, 20, 2006, 20, 12, 99, 104, 1, 99, 0, 8] + [0] * 8
+        outputs, status = BatchComputer(program, [[0], [10**6]]).run()
+        assert outputs == [[1], []]
+        assert (status == RunResult.HALTED.value).all()
+
+    def test_overflow(self):
+        with pytest.raises(OverflowError):
+            BatchComputer([1102, 2**40, 2**40, 0, 99], lanes=2).run()
+        with pytest.raises(OverflowError):
+            BatchComputer([1101, 2**62, 2**62, 0, 99], lanes=2).run()
+
+    def test_address_out_of_range(self):
+        with pytest.raises(IndexError):
+            BatchComputer([4, 100, 99], lanes=1, extra_memory=10).run()
@@ -0,0 +1,64 @@
+from .cache import ResultCache, digest
+from .compiler import CompiledComputer
+from .computer import RunResult
+from .example_programs import COUNTDOWN, ECHO
+from .image import ProgramImage
+from .memory import PagedMemory
+
+
+class TestResultCache:
+    def test_digest(self):
+        assert digest(COUNTDOWN, []) == digest(ProgramImage(COUNTDOWN), [])
+        assert digest(ECHO, [1, 23]) != digest(ECHO, [12, 3])
+        assert digest([104, 2**70, 99], []) != digest([104, 2**71, 99], [])
+
+    def test_image_is_hashed_once(self, monkeypatch):
+        image = ProgramImage(COUNTDOWN)
+        key = digest(image, [1])
+
+        def tolist(self):
+            raise AssertionError("hashed again")
+
+        monkeypatch.setattr(PagedMemory, "tolist", tolist)
+        assert digest(image, [1]) == key
+        assert digest(image, [2]) != key
+
+    def test_hits(self):
+        cache = ResultCache()
+        first = cache.run(ECHO, [5, 0])
+        assert first.outputs == [5, 0]
+        assert first.result == RunResult.HALTED
+        assert cache.run(ECHO, [5, 0]) is first
+        assert cache.run(ECHO, [5]).result == RunResult.BLOCK_ON_INPUT
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_keep_memory(self):
+        cache = ResultCache()
+        assert cache.run(COUNTDOWN).memory is None
+        cached = cache.run(COUNTDOWN, keep_memory=True, computer_class=CompiledComputer)
+        assert cached.memory[11] == 0
+        assert cache.misses == 2
+        # a run which kept memory also serves runs which don't need it
+        assert cache.run(COUNTDOWN) is cached
+
+    def test_lru(self):
+        cache = ResultCache(maxsize=2)
+        for value in [1, 2, 1, 3]:
+            cache.run(ECHO, [value, 0])
+        assert cache.hits == 1
+        # 2 was the least recently used
+        cache.run(ECHO, [1, 0])
+        cache.run(ECHO, [2, 0])
+        assert (cache.hits, cache.misses) == (2, 4)
+
+    def test_disk(self, tmp_path):
+        directory = str(tmp_path / "results")
+        ResultCache(directory=directory).run(COUNTDOWN, keep_memory=True)
+
+        cache = ResultCache(directory=directory)
+        cached = cache.run(COUNTDOWN, keep_memory=True)
+        assert cache.hits == 1
+        assert cached.outputs == [2, 1, 0]
+        assert cached.result == RunResult.HALTED
+        assert cached.memory[11] == 0
+        assert len(list((tmp_path / "results").iterdir())) == 1
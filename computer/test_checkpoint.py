@@ -0,0 +1,74 @@
+import pytest  # type: ignore
+
+from . import checkpoint
+from .checkpoint import CheckpointError
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult
+from .example_programs import COUNTDOWN
+from .memory import PAGE_SIZE
+
+
+class TestCheckpoint:
+    def test_round_trip(self):
+        c = Computer([3, 0, 99], inputs=[7, 8])
+        c.memory[3 * PAGE_SIZE] = -5
+        c.memory[3 * PAGE_SIZE + 1] = 2**70
+        c.memory[10 * PAGE_SIZE] = 1
+        c.run(max_instructions=1)
+        c.output = [1, -2]
+
+        loaded = checkpoint.loads(checkpoint.dumps(c))
+        assert loaded.memory == c.memory
+        assert loaded.memory[3 * PAGE_SIZE + 1] == 2**70
+        assert loaded.pos == c.pos
+        assert list(loaded.input_queue) == [8]
+        assert loaded.output == [1, -2]
+        assert loaded.instructions_executed == 1
+        assert loaded.run() == ([], RunResult.HALTED)
+
+    def test_load_as_compiled_computer(self):
+        c = Computer(COUNTDOWN)
+        c.run(max_instructions=3)
+        loaded = checkpoint.loads(checkpoint.dumps(c), CompiledComputer)
+        assert isinstance(loaded, CompiledComputer)
+        assert loaded.run() == c.run() == ([1, 0], RunResult.HALTED)
+
+    def test_rejects_corrupt_checkpoints(self):
+        data = checkpoint.dumps(Computer(COUNTDOWN))
+        with pytest.raises(CheckpointError, match="corrupt"):
+            checkpoint.loads(data[:-1] + bytes([data[-1] ^ 1]))
+        with pytest.raises(CheckpointError, match="not a checkpoint"):
+            checkpoint.loads(b"XXXX" + data[4:])
+        with pytest.raises(CheckpointError, match="version"):
+            checkpoint.loads(data[:4] + b"\x09\x00" + data[6:])
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "state.ckpt")
+        c = Computer(COUNTDOWN)
+        c.run(max_instructions=1)
+        checkpoint.save(c, path)
+        # no temporary files are left behind
+        assert list(tmp_path.iterdir()) == [tmp_path / "state.ckpt"]
+        assert checkpoint.load(path).run() == ([2, 1, 0], RunResult.HALTED)
+
+    def test_run_with_checkpoints(self, tmp_path):
+        path = str(tmp_path / "state.ckpt")
+        c = Computer(COUNTDOWN)
+        assert checkpoint.run_with_checkpoints(c, path, every=4) == (
+            [2, 1, 0],
+            RunResult.HALTED,
+        )
+        assert checkpoint.load(path).halted
+
+    def test_resume(self, tmp_path):
+        path = str(tmp_path / "state.ckpt")
+        c = Computer(COUNTDOWN)
+        # the state saved by the first checkpoint, before a crash
+        assert c.run(max_instructions=3) == ([2], RunResult.RUNNABLE)
+        checkpoint.save(c, path)
+
+        resumed = checkpoint.load(path)
+        assert checkpoint.run_with_checkpoints(resumed, path, 4, resume=True) == (
+            [2, 1, 0],
+            RunResult.HALTED,
+        )
@@ -0,0 +1,102 @@
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult, parse_program
+from .example_programs import ECHO, LARGER_EXAMPLE
+
+
+class TestCompiledComputer:
+    def test_same_outputs_as_interpreter(self):
+        for inp in [0, 8, 10]:
+            expected = Computer(LARGER_EXAMPLE, inputs=[inp]).run()
+            assert CompiledComputer(LARGER_EXAMPLE, inputs=[inp]).run() == expected
+
+    def test_quine(self):
+        program = parse_program(
+            "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99"
+        )
+        outputs, result = CompiledComputer(program).run()
+        assert outputs == program
+        assert result == RunResult.HALTED
+
+    def test_memory_matches_interpreter(self):
+        program = [1, 1, 1, 4, 99, 5, 6, 0, 99]
+        c = CompiledComputer(program)
+        c.run()
+        assert c.memory == [30, 1, 1, 4, 2, 5, 6, 0, 99]
+
+    def test_blocks_are_reused(self):
+        # count down from 3 at addr 9, looping back to the start
+        c = CompiledComputer(parse_program("1001,9,-1,9,1005,9,0,99,0,3"))
+        c.run()
+        assert c.memory[9] == 0
+        assert c.blocks.get(0).function is not None
+        assert len(c.blocks) == 2
+
+    def test_write_into_own_block(self):
+        program = parse_program(
+            # overwrite the first operand of the next instruction with 100
+            "1101,0,100,5,"
+            # add 1 + 1, rewritten above to 100 + 1, storing into addr 11
+            + "1101,1,1,11,"
+            + "4,11,99"
+        )
+        outputs, result = CompiledComputer(program).run()
+        assert outputs == [101]
+
+    def test_written_instructions_go_back_to_interpreter(self):
+        program = parse_program(
+            # loop counter at addr 23, from 3 down to 0
+            "1001,23,-1,23,"
+            # patch the first operand of the add at addr 12 to counter + 24
+            + "1001,23,24,13,"
+            + "1105,1,12,"
+            + "0,"
+            # copy the patched address to addr 22 and output it
+            + "1001,0,0,22,"
+            + "4,22,"
+            + "1005,23,0,"
+            + "99,"
+            + "0,3,7,8,9"
+        )
+        c = CompiledComputer(program)
+        outputs, result = c.run()
+        assert outputs == [9, 8, 7]
+        assert outputs == Computer(program).run()[0]
+        assert 13 in c.volatile
+        assert c.blocks.get(12).function is None
+
+    def test_until_blocked(self):
+        c = CompiledComputer(ECHO)
+        c.add_input(5)
+        assert c.run(until_blocked=True) == ([5], RunResult.BLOCK_ON_INPUT)
+        c.add_input(0)
+        assert c.run(until_blocked=True) == ([0], RunResult.HALTED)
+        assert c.halted
+
+    def test_max_instructions(self):
+        c = CompiledComputer(parse_program("1001,10,-1,10,1005,10,0,104,7,99,3"))
+        # stops part way through the first block
+        assert c.run(max_instructions=1) == ([], RunResult.RUNNABLE)
+        assert c.pos == 4
+        assert c.run(max_instructions=5) == ([], RunResult.RUNNABLE)
+        assert c.instructions_executed == 6
+        assert c.run() == ([7], RunResult.HALTED)
+        assert c.instructions_executed == 8
+
+    def test_fork_shares_blocks(self):
+        c = CompiledComputer(parse_program("1001,10,-1,10,1005,10,0,104,7,99,3"))
+        c.run(max_instructions=2)
+        fork = c.fork()
+        assert fork.blocks.get(0) is c.blocks.get(0)
+        assert fork.run() == c.run() == ([7], RunResult.HALTED)
+
+    def test_restore(self):
+        program = parse_program("3,20,4,20,1101,0,99,2,1105,1,0")
+        c = CompiledComputer(program)
+        snapshot = c.snapshot()
+        c.add_input(5)
+        assert c.run(until_blocked=True) == ([5], RunResult.BLOCK_ON_INPUT)
+        c.add_input(6)
+        assert c.run(until_blocked=True) == ([], RunResult.HALTED)
+        c.restore(snapshot)
+        c.add_input(7)
+        assert c.run(until_blocked=True) == ([7], RunResult.BLOCK_ON_INPUT)
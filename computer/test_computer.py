@@ -1,4 +1,16 @@
-from .computer import Computer, ParamMode, RunResult, parse_program
+import pytest  # type: ignore
+
+from .computer import (
+    Computer,
+    ParamMode,
+    RunResult,
+    FAST_PARSE_LENGTH,
+    NoInputError,
+    decode_ascii,
+    encode_ascii,
+    parse_program,
+)
+from .example_programs import ECHO
 
 
 def test_parse_instruction():
@@ -8,6 +20,26 @@ def test_parse_instruction():
     assert c.param_modes == [ParamMode.RELATIVE]
 
 
+class TestParseProgram:
+    def test_large_program(self):
+        program = [n * (-1) ** n for n in range(FAST_PARSE_LENGTH)]
+        assert parse_program(",".join(map(str, program))) == program
+
+    def test_large_program_with_big_integers(self):
+        program = [2**70, -(2**63)] + list(range(FAST_PARSE_LENGTH))
+        assert parse_program(",".join(map(str, program))) == program
+
+    def test_large_program_with_spaces(self):
+        program = list(range(FAST_PARSE_LENGTH))
+        assert parse_program(",\n ".join(map(str, program))) == program
+
+    def test_large_program_which_is_malformed(self):
+        program = ",".join(map(str, range(FAST_PARSE_LENGTH)))
+        for text in [program + ",", program + ",x,1", "1,,2," + program]:
+            with pytest.raises(ValueError):
+                parse_program(text)
+
+
 class TestProblem02:
     def test_problem02(self):
         cases = [
@@ -147,3 +179,184 @@ class TestProblem09:
         outputs, result = Computer(program, inputs=[2]).run()
         # 2 * 2 = 4
         assert outputs == [4]
+
+
+class TestDecodeCache:
+    def test_decodes_each_address_once(self):
+        # count down from 3 at addr 9, looping back to the start
+        program = parse_program("1001,9,-1,9,1005,9,0,99,0,3")
+        c = Computer(program)
+        c.run()
+        assert c.memory[9] == 0
+        # both loop instructions plus the halt, even though the loop ran 3 times
+        assert len(c.decoded) == 3
+        assert c.decoded.get(0) == c.decode(0)
+
+    def test_self_modifying_write_invalidates_instruction(self):
+        program = parse_program(
+            # overwrite the parameter of the output instruction at addr 4
+            "1101,0,10,5,"
+            # output addr 7, overwritten with 10 above
+            + "4,7,99,0,0,0,42"
+        )
+        c = Computer(program)
+        # decode the output instruction before it gets overwritten
+        assert c.decode(4).params == [7]
+        outputs, result = c.run()
+        assert outputs == [42]
+        assert c.decoded.get(4).params == [10]
+
+    def test_write_only_invalidates_covering_entries(self):
+        c = Computer(parse_program("1101,1,2,20,1101,3,4,21,99"))
+        c.run()
+        assert len(c.decoded) == 3
+        c.write(5, addr=6)
+        assert c.decoded.get(0) is not None
+        assert c.decoded.get(4) is None
+        assert c.decoded.get(8) is not None
+
+
+class TestIOPorts:
+    def test_input_fn(self):
+        inputs = iter([3, 2, 1, 0])
+        c = Computer(ECHO, input_fn=lambda: next(inputs))
+        assert c.run() == ([3, 2, 1, 0], RunResult.HALTED)
+
+    def test_input_fn_queue_comes_first(self):
+        inputs = iter([0])
+        c = Computer(ECHO, inputs=[5], input_fn=lambda: next(inputs))
+        assert c.run() == ([5, 0], RunResult.HALTED)
+
+    def test_input_fn_returning_none_blocks(self):
+        c = Computer(ECHO, inputs=[4], input_fn=lambda: None)
+        assert c.run(until_blocked=True) == ([4], RunResult.BLOCK_ON_INPUT)
+
+    def test_no_input_without_blocking(self):
+        c = Computer(ECHO, inputs=[4], input_fn=lambda: None)
+        with pytest.raises(NoInputError, match="input instruction at 0"):
+            c.run()
+        with pytest.raises(NoInputError, match="no inputs given"):
+            Computer(ECHO).run()
+
+    def test_output_fn(self):
+        received = []
+        c = Computer(ECHO, inputs=[4, 0], output_fn=received.append)
+        assert c.run() == ([], RunResult.HALTED)
+        assert received == [4, 0]
+
+    def test_until_outputs(self):
+        c = Computer(ECHO, inputs=[3, 2, 1, 0])
+        assert c.run(until_outputs=2) == ([3, 2], RunResult.RUNNABLE)
+        assert c.run(until_outputs=1) == ([1], RunResult.RUNNABLE)
+        assert c.run() == ([0], RunResult.HALTED)
+
+    def test_add_inputs(self):
+        c = Computer(ECHO)
+        c.add_inputs(range(3, 0, -1))
+        c.add_inputs(iter([0]))
+        assert c.run() == ([3, 2, 1, 0], RunResult.HALTED)
+
+    def test_ascii(self):
+        c = Computer(ECHO)
+        c.add_ascii("NOT A J\n")
+        c.add_input(0)
+        outputs, result = c.run()
+        assert decode_ascii(outputs[:-1]) == "NOT A J\n"
+        assert encode_ascii("WALK") == [87, 65, 76, 75]
+
+    def test_not_ascii(self):
+        with pytest.raises(ValueError):
+            decode_ascii([72, 105, 19349])
+        with pytest.raises(ValueError):
+            decode_ascii([72, 200])
+        with pytest.raises(ValueError):
+            encode_ascii("caf\u00e9")
+
+
+class TestMaxInstructions:
+    # count down from 3, then output 7
+    COUNTDOWN = parse_program("1001,10,-1,10,1005,10,0,104,7,99,3")
+
+    def test_slices(self):
+        c = Computer(self.COUNTDOWN)
+        assert c.run(max_instructions=5) == ([], RunResult.RUNNABLE)
+        assert c.instructions_executed == 5
+        assert c.pos == 4
+        assert c.run(max_instructions=5) == ([7], RunResult.HALTED)
+        # 3 times round the loop, the output and the halt
+        assert c.instructions_executed == 8
+
+    def test_blocked_input_is_not_counted(self):
+        c = Computer([3, 0, 99])
+        c.run(until_blocked=True, max_instructions=10)
+        assert c.instructions_executed == 0
+
+
+class TestForkAndSnapshot:
+    # echo inputs until a 0 is read, counting them at addr 13
+    ECHO = parse_program("3,12,4,12,1001,13,1,13,1005,12,0,99,0,0")
+
+    def test_fork_is_independent(self):
+        c = Computer(self.ECHO)
+        c.add_input(5)
+        c.run(until_blocked=True)
+
+        fork = c.fork()
+        fork.add_input(6)
+        assert fork.run(until_blocked=True) == ([6], RunResult.BLOCK_ON_INPUT)
+        assert fork.memory[13] == 2
+        assert c.memory[13] == 1
+        assert not c.input_queue
+
+        c.add_input(0)
+        assert c.run(until_blocked=True) == ([0], RunResult.HALTED)
+        assert not fork.halted
+
+    def test_fork_shares_decoded_code_until_written(self):
+        c = Computer(self.ECHO, inputs=[5])
+        c.run(until_blocked=True)
+        c.output.append(1)
+
+        fork = c.fork()
+        assert fork.decoded.entries is c.decoded.entries
+        fork.output.append(2)
+        assert c.output == [5, 1]
+
+        # overwrite the output with a halt, in the fork only
+        fork.write(99, 2)
+        assert fork.decoded.get(2) is None
+        assert c.decoded.get(2) is not None
+        fork.add_input(6)
+        assert fork.run(until_blocked=True) == ([], RunResult.HALTED)
+        c.add_input(6)
+        assert c.run(until_blocked=True) == ([6], RunResult.BLOCK_ON_INPUT)
+
+    def test_restore(self):
+        c = Computer(self.ECHO)
+        c.add_input(5)
+        c.run(until_blocked=True)
+        snapshot = c.snapshot()
+
+        for _ in range(2):
+            c.add_input(0)
+            assert c.run(until_blocked=True) == ([0], RunResult.HALTED)
+            c.restore(snapshot)
+            assert not c.halted
+            assert c.memory[13] == 1
+            assert c.instructions_executed == 4
+
+    def test_restore_drops_code_written_since(self):
+        # read and output a value, then overwrite the output with a halt
+        # and loop back
+        program = parse_program("3,20,4,20,1101,0,99,2,1105,1,0")
+        c = Computer(program)
+        snapshot = c.snapshot()
+        c.add_input(5)
+        assert c.run(until_blocked=True) == ([5], RunResult.BLOCK_ON_INPUT)
+        c.add_input(6)
+        assert c.run(until_blocked=True) == ([], RunResult.HALTED)
+
+        # the halt decoded at addr 2 must not outlive the restore
+        c.restore(snapshot)
+        c.add_input(7)
+        assert c.run(until_blocked=True) == ([7], RunResult.BLOCK_ON_INPUT)
@@ -0,0 +1,75 @@
+import pytest  # type: ignore
+
+from . import cycles
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult, parse_program
+from .cycles import CycleDetector, RunawayError
+from .example_programs import COUNTDOWN
+
+# flips the cell at 11 between 0 and 1 forever
+FLIPPER = parse_program("1002,11,-1,11,1001,11,1,11,1105,1,0,0")
+
+# counts up at 7 forever
+COUNTER = parse_program("1001,7,1,7,1105,1,0,0")
+
+
+class TestCycleDetector:
+    def test_jump_to_self(self):
+        c = Computer(parse_program("1105,1,0"), tracer=CycleDetector())
+        with pytest.raises(RunawayError) as e:
+            c.run()
+        assert e.value.cycle.pos == 0
+        assert e.value.cycle.length == 1
+
+    def test_memory_changes_round_cycle(self):
+        c = CompiledComputer(FLIPPER, tracer=CycleDetector())
+        with pytest.raises(RunawayError) as e:
+            c.run()
+        assert e.value.cycle.pos == 0
+        assert e.value.cycle.length == 6
+
+    def test_no_cycle(self):
+        c = Computer(COUNTDOWN, tracer=CycleDetector())
+        assert c.run() == ([2, 1, 0], RunResult.HALTED)
+
+    def test_budget(self):
+        c = Computer(COUNTER, tracer=CycleDetector(max_instructions=1000))
+        with pytest.raises(RunawayError) as e:
+            c.run()
+        assert e.value.cycle is None
+        assert c.instructions_executed == 1000
+
+    def test_output_breaks_cycle(self):
+        outputs = []
+        c = Computer(
+            parse_program("104,1,1105,1,0"),
+            tracer=CycleDetector(max_instructions=100),
+            output_fn=outputs.append,
+        )
+        with pytest.raises(RunawayError) as e:
+            c.run()
+        assert e.value.cycle is None
+        assert len(outputs) == 50
+
+    def test_hash_collisions(self, monkeypatch):
+        # every memory hashes the same, so each trip looks like a cycle
+        monkeypatch.setattr(cycles, "cell_hash", lambda addr, value: 0)
+        c = Computer(COUNTER, tracer=CycleDetector(max_instructions=1000))
+        with pytest.raises(RunawayError) as e:
+            c.run()
+        assert e.value.cycle is None
+
+    def test_memory_changed_between_runs(self):
+        # reads an input while the cell at 100000 is set, else loops forever
+        program = parse_program("3,20,1005,100000,0,1105,1,2")
+        detector = CycleDetector()
+        c = Computer(program, tracer=detector)
+        c.memory[100000] = 1
+        c.add_input(5)
+        assert c.run(until_blocked=True) == ([], RunResult.BLOCK_ON_INPUT)
+        c.memory[100000] = 0
+        c.memory[20] = 6
+        c.add_input(7)
+        with pytest.raises(RunawayError):
+            c.run()
+        assert detector.memory_hash == cycles.memory_hash(c.memory, c.memory.pages)
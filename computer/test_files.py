@@ -0,0 +1,28 @@
+import os
+
+import pytest  # type: ignore
+
+from .files import atomic_write
+
+
+class TestAtomicWrite:
+    def test_write(self, tmp_path):
+        path = str(tmp_path / "out")
+        atomic_write(path, b"abc")
+        atomic_write(path, [b"de", memoryview(b"f")])
+        with open(path, "rb") as f:
+            assert f.read() == b"def"
+
+    def test_failure_keeps_old_file(self, tmp_path):
+        path = str(tmp_path / "out")
+        atomic_write(path, b"abc")
+
+        def chunks():
+            yield b"de"
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            atomic_write(path, chunks())
+        with open(path, "rb") as f:
+            assert f.read() == b"abc"
+        assert os.listdir(str(tmp_path)) == ["out"]
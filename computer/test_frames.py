@@ -0,0 +1,47 @@
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from .computer import Computer, parse_program
+from .frames import FrameDecoder, frame_array, frames
+
+# outputs three (x, y, tile) triples
+SCREEN = parse_program("104,1,104,2,104,3,104,4,104,5,104,6,104,-7,104,8,104,9,99")
+
+
+class TestFrames:
+    def test_frames(self):
+        outputs, _ = Computer(SCREEN).run()
+        assert list(frames(outputs, 3)) == [(1, 2, 3), (4, 5, 6), (-7, 8, 9)]
+        assert list(frames(iter(outputs), 3)) == list(frames(outputs, 3))
+        with pytest.raises(ValueError):
+            frames(outputs, 2)
+
+    def test_frame_array(self):
+        outputs, _ = Computer(SCREEN).run()
+        a = frame_array(outputs, 3)
+        assert a.shape == (3, 3)
+        assert a[2].tolist() == [-7, 8, 9]
+
+        out = np.zeros((10, 3), dtype=np.int64)
+        a = frame_array(outputs, 3, out=out)
+        assert a.base is out
+        assert a.tolist() == [[1, 2, 3], [4, 5, 6], [-7, 8, 9]]
+
+        with pytest.raises(ValueError):
+            frame_array(outputs, 3, out=np.zeros((2, 3), dtype=np.int64))
+        with pytest.raises(ValueError):
+            frame_array(outputs, 4)
+        with pytest.raises(OverflowError):
+            frame_array([1, 2**70, 3], 3)
+
+    def test_decoder(self):
+        received = []
+        decoder = FrameDecoder(3, lambda *frame: received.append(frame))
+        Computer(SCREEN, output_fn=decoder).run()
+        assert received == [(1, 2, 3), (4, 5, 6), (-7, 8, 9)]
+        assert decoder.complete
+
+        decoder(10)
+        assert not decoder.complete
+        decoder.reset()
+        assert decoder.complete
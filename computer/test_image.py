@@ -0,0 +1,83 @@
+import pytest  # type: ignore
+
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult, load_program
+from .example_programs import COUNTDOWN
+from .image import ProgramImage
+from .memory import PAGE_SIZE
+
+
+class TestProgramImage:
+    def test_computers_share_pages(self):
+        image = ProgramImage(COUNTDOWN + [0] * PAGE_SIZE)
+        a, b = Computer(image), CompiledComputer(image)
+        assert a.memory.pages[1] is b.memory.pages[1] is image.memory.pages[1]
+
+        assert a.run() == b.run() == ([2, 1, 0], RunResult.HALTED)
+        # only the written page was copied
+        assert a.memory.pages[0] is not image.memory.pages[0]
+        assert a.memory.pages[1] is image.memory.pages[1]
+        assert image.memory[11] == 3
+
+    def test_shared_memory(self):
+        pytest.importorskip("multiprocessing.shared_memory")
+        image = ProgramImage(COUNTDOWN)
+        shm = image.to_shared_memory()
+        try:
+            attached = ProgramImage.attach(shm.name)
+            assert attached.memory == COUNTDOWN
+            assert attached.memory.pages[0].readonly
+            c = Computer(attached)
+            assert c.run() == ([2, 1, 0], RunResult.HALTED)
+            # the block itself is never written
+            assert attached.memory[11] == 3
+            assert Computer(attached).run() == ([2, 1, 0], RunResult.HALTED)
+            del c
+            attached.memory.pages.clear()
+            attached.shm.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_big_integers_cannot_be_shared(self):
+        with pytest.raises(OverflowError):
+            ProgramImage([104, 2**70, 99]).to_shared_memory()
+
+
+class TestProgramFile:
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "countdown.icp")
+        program = COUNTDOWN + [0] * (2 * PAGE_SIZE) + [5]
+        ProgramImage(program).save(path)
+
+        image = ProgramImage.load(path)
+        assert image.memory == program
+        assert isinstance(image.memory.pages[0], memoryview)
+        assert image.memory.pages[0].readonly
+        assert Computer(image).run() == ([2, 1, 0], RunResult.HALTED)
+        assert CompiledComputer(image).run() == ([2, 1, 0], RunResult.HALTED)
+        # the file itself is never written
+        assert ProgramImage.load(path).memory[11] == 3
+
+    def test_keeps_start(self, tmp_path):
+        path = str(tmp_path / "countdown.icp")
+        image = ProgramImage(COUNTDOWN)
+        image.pos, image.relative_base = 4, 7
+        image.save(path)
+        loaded = ProgramImage.load(path)
+        assert (loaded.pos, loaded.relative_base) == (4, 7)
+
+    def test_load_program(self, tmp_path):
+        text, binary = tmp_path / "input", tmp_path / "input.icp"
+        text.write_text("1001,11,-1,11,4,11,1005,11,0,99,0,3\n")
+        load_program(str(text)).save(str(binary))
+        for path in (text, binary):
+            assert load_program(str(path)).memory == COUNTDOWN
+
+    def test_not_a_program_file(self, tmp_path):
+        path = tmp_path / "input.icp"
+        path.write_bytes(b"ICPG")
+        with pytest.raises(ValueError):
+            ProgramImage.load(str(path))
+        with pytest.raises(OverflowError):
+            ProgramImage([104, 2**70, 99]).save(str(path))
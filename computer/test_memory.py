@@ -0,0 +1,123 @@
+import pytest  # type: ignore
+
+from .computer import Computer, parse_program
+from array import array
+
+from .memory import PAGE_SIZE, PagedMemory
+
+
+class TestPagedMemory:
+    def test_load(self):
+        values = list(range(PAGE_SIZE + 5))
+        m = PagedMemory(values)
+        assert len(m) == PAGE_SIZE + 5
+        assert len(m.pages) == 2
+        assert m == values
+        assert m.tolist() == values
+
+    def test_untouched_reads_are_zero(self):
+        m = PagedMemory([1, 2, 3])
+        assert m[10_000_000] == 0
+        assert len(m.pages) == 1
+        assert len(m) == 3
+
+    def test_write_allocates_one_page(self):
+        m = PagedMemory([1, 2, 3])
+        m[10_000_000] = 7
+        assert m[10_000_000] == 7
+        assert m[10_000_001] == 0
+        assert len(m.pages) == 2
+        assert len(m) == 10_000_001
+
+    def test_negative_address(self):
+        m = PagedMemory([1, 2, 3])
+        with pytest.raises(IndexError):
+            m[-1]
+        with pytest.raises(IndexError):
+            m[-1] = 5
+
+    def test_equality(self):
+        assert PagedMemory([1, 2, 3]) == [1, 2, 3]
+        assert PagedMemory([1, 2, 3]) == PagedMemory([1, 2, 3])
+        assert PagedMemory([1, 2, 3]) != [1, 2]
+        assert PagedMemory([1, 2, 3]) != [1, 2, 4]
+
+    def test_pages_are_int64_arrays(self):
+        m = PagedMemory([1, 2, 3])
+        assert isinstance(m.pages[0], array)
+        assert m.nbytes == 8 * PAGE_SIZE
+
+    def test_big_integers_promote_page(self):
+        m = PagedMemory([1, 2, 3])
+        m[PAGE_SIZE] = 5
+        m[2] = 2**70
+        assert m[2] == 2**70
+        assert m[1] == 2
+        assert isinstance(m.pages[0], list)
+        # other pages stay compact
+        assert isinstance(m.pages[1], array)
+
+    def test_load_big_integers(self):
+        values = [2**64] * PAGE_SIZE
+        assert PagedMemory(values) == values
+
+    def test_views(self):
+        m = PagedMemory([1, 2, 3])
+        m[5 * PAGE_SIZE] = 9
+        views = list(m.views())
+        assert [addr for addr, view in views] == [0, 5 * PAGE_SIZE]
+        addr, view = views[0]
+        assert view[:3].tolist() == [1, 2, 3]
+        # views share the page's buffer
+        m[1] = 20
+        assert view[1] == 20
+
+    def test_copy(self):
+        m = PagedMemory([1, 2, 3])
+        copy = m.copy()
+        copy[0] = 10
+        assert m[0] == 1
+        assert copy == [10, 2, 3]
+
+    def test_copy_on_write(self):
+        m = PagedMemory(range(2 * PAGE_SIZE))
+        copy = m.copy()
+        assert copy.pages[0] is m.pages[0]
+        # only the written page is copied, by whichever memory writes first
+        m[1] = 20
+        assert copy.pages[0] is not m.pages[0]
+        assert copy.pages[1] is m.pages[1]
+        assert copy[1] == 1
+        copy[1] = 30
+        assert m[1] == 20
+        assert m.changed_pages(copy) == {0}
+
+    def test_changed_pages_includes_new_pages(self):
+        m = PagedMemory([1, 2, 3])
+        copy = m.copy()
+        copy[3 * PAGE_SIZE] = 1
+        assert m.changed_pages(copy) == {3}
+
+    def test_changed_cells(self):
+        m = PagedMemory(range(1, 10))
+        copy = m.copy()
+        copy[3] = 4
+        copy[5] = 0
+        copy[PAGE_SIZE + 1] = 7
+        assert list(copy.changed_cells(m)) == [5, PAGE_SIZE + 1]
+        assert list(m.changed_cells(copy)) == [5, PAGE_SIZE + 1]
+
+
+class TestComputerMemory:
+    def test_far_addresses(self):
+        # copy addr 10,000,000 (never written) + 5 into 20,000,000, then output it
+        program = parse_program("101,5,10000000,20000000,4,20000000,99")
+        c = Computer(program)
+        outputs, result = c.run()
+        assert outputs == [5]
+        assert len(c.memory.pages) == 2
+
+    def test_big_integer_results(self):
+        program = [1102, 2**40, 2**40, 7, 4, 7, 99, 0]
+        outputs, result = Computer(program).run()
+        assert outputs == [2**80]
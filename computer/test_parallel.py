@@ -0,0 +1,72 @@
+import pickle
+
+from .computer import RunResult, parse_program
+from .example_programs import LARGER_EXAMPLE
+from .image import ProgramImage
+from .parallel import sweep
+
+# adds the values at the addresses patched into 1 and 2, storing to addr 0
+ADD = parse_program("1,0,0,0,99,10,20,30")
+
+
+class TestSweep:
+    def test_every_input_set_is_run(self):
+        input_sets = [[n] for n in range(6, 11)]
+        results = sorted(sweep(LARGER_EXAMPLE, input_sets, workers=2))
+        assert [r.run_index for r in results] == [0, 1, 2, 3, 4]
+        assert [r.outputs for r in results] == [[999], [999], [1000], [1001], [1001]]
+        assert all(r.result == RunResult.HALTED for r in results)
+
+    def test_patches_and_read(self):
+        patches = [{1: a, 2: b} for a in range(5, 8) for b in range(5, 8)]
+        results = sorted(sweep(ADD, patches=patches, read=[0], workers=2, chunksize=4))
+        assert [r.memory[0] for r in results] == [20, 30, 40, 30, 40, 50, 40, 50, 60]
+
+    def test_without_shared_memory(self, monkeypatch):
+        def to_shared_memory(self):
+            raise ImportError("no shared memory before Python 3.8")
+
+        monkeypatch.setattr(ProgramImage, "to_shared_memory", to_shared_memory)
+        results = sorted(sweep(LARGER_EXAMPLE, [[7], [9]], workers=2))
+        assert [r.outputs for r in results] == [[999], [1001]]
+
+    def test_loaded_image_without_shared_memory(self, monkeypatch, tmp_path):
+        def to_shared_memory(self):
+            raise ImportError("no shared memory before Python 3.8")
+
+        monkeypatch.setattr(ProgramImage, "to_shared_memory", to_shared_memory)
+        path = str(tmp_path / "larger.icp")
+        ProgramImage(LARGER_EXAMPLE).save(path)
+        image = ProgramImage.load(path)
+        # as the image is sent to workers when they are spawned
+        sent = pickle.loads(pickle.dumps(image))
+        assert sent.memory == LARGER_EXAMPLE
+        results = sorted(sweep(image, [[7], [9]], workers=2))
+        assert [r.outputs for r in results] == [[999], [1001]]
+
+    def test_stop(self):
+        patches = [{1: a, 2: b} for a in range(5, 8) for b in range(5, 8)]
+        results = list(
+            sweep(
+                ADD,
+                patches=patches,
+                read=[0],
+                workers=0,
+                stop=lambda r: r.memory[0] == 50,
+            )
+        )
+        assert results[-1].memory[0] == 50
+        assert len(results) == 6
+
+    def test_stop_in_workers(self):
+        input_sets = [[n] for n in range(100)]
+        results = list(
+            sweep(
+                LARGER_EXAMPLE,
+                input_sets,
+                workers=2,
+                stop=lambda r: r.outputs == [1000],
+            )
+        )
+        assert results[-1].run_index == 8
+        assert len(results) < 100
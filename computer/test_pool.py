@@ -0,0 +1,47 @@
+from .compiler import CompiledComputer
+from .computer import RunResult, parse_program
+from .pool import ComputerPool
+
+# outputs its input doubled
+DOUBLER = parse_program("3,9,1002,9,2,9,4,9,99,0")
+
+# outputs 1 on the first run, and 2 on later runs of the same memory, having
+# rewritten its own code
+SELF_MODIFYING = parse_program("104,1,1101,0,2,1,99")
+
+
+class TestComputerPool:
+    def test_reuse(self):
+        pool = ComputerPool(DOUBLER)
+        c = pool.acquire(21)
+        assert c.run() == ([42], RunResult.HALTED)
+        pool.release(c)
+
+        again = pool.acquire([5])
+        assert again is c
+        assert again.memory == DOUBLER
+        assert (again.pos, again.halted, again.instructions_executed) == (0, False, 0)
+        assert again.run() == ([10], RunResult.HALTED)
+        assert (pool.created, pool.reused) == (1, 1)
+
+    def test_keeps_unwritten_code(self):
+        pool = ComputerPool(DOUBLER)
+        with pool.computer([1]) as c:
+            c.run()
+        # only the cell holding the input changed, which isn't code
+        assert set(c.decoded.entries) == {0, 2, 6, 8}
+
+    def test_self_modifying(self):
+        pool = ComputerPool(SELF_MODIFYING, computer_class=CompiledComputer)
+        for _ in range(3):
+            with pool.computer() as c:
+                assert c.run() == ([1], RunResult.HALTED)
+        assert pool.created == 1
+
+    def test_io_is_reset(self):
+        pool = ComputerPool(DOUBLER)
+        outputs = []
+        with pool.computer(input_fn=lambda: 3, output_fn=outputs.append) as c:
+            c.run()
+        assert outputs == [6]
+        assert c.input_fn is None and c.output_fn is None
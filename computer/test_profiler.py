@@ -0,0 +1,43 @@
+import json
+
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult
+from .example_programs import COUNTDOWN, ECHO
+from .profiler import Profiler
+
+
+class TestProfiler:
+    def test_counts(self):
+        profiler = Profiler()
+        c = Computer(COUNTDOWN, tracer=profiler)
+        c.run()
+        assert profiler.instructions == 10
+        assert profiler.opcodes == {1: 3, 4: 3, 5: 3, 99: 1}
+        assert profiler.addresses[0] == 3
+        assert profiler.addresses[9] == 1
+        assert profiler.outputs == 3
+        assert profiler.runs == 1
+        assert profiler.memory_high_water == len(COUNTDOWN)
+
+    def test_runs_and_blocked_time(self):
+        profiler = Profiler()
+        c = CompiledComputer(ECHO, tracer=profiler)
+        for value in [5, 6, 0]:
+            c.add_input(value)
+            c.run(until_blocked=True)
+        assert profiler.runs == 3
+        assert profiler.inputs == 3
+        assert profiler.blocked_time > 0
+        assert profiler.blocked_since is None
+        assert profiler.running_time > 0
+
+    def test_report(self):
+        profiler = Profiler()
+        Computer(COUNTDOWN, tracer=profiler).run()
+        report = json.loads(profiler.to_json())
+        assert report["opcodes"]["ADD"] == 3
+        assert report["addresses"]["9"] == 1
+
+        lines = profiler.hotspots(limit=2).splitlines()
+        assert len(lines) == 3
+        assert lines[1].split() == ["0", "ADD", "3", "30.00"]
@@ -0,0 +1,83 @@
+import pytest  # type: ignore
+
+from .computer import Computer, RunResult, parse_program
+from .recorder import EventKind, TraceError, TraceReader, TraceRecorder, replay
+
+# outputs each input doubled, until a 0 is read
+DOUBLER = parse_program("3,15,1006,15,14,1002,15,2,16,4,16,1105,1,0,99,0,0")
+
+
+def record(path, inputs, pcs=False):
+    with TraceRecorder(str(path), pcs=pcs) as recorder:
+        c = Computer(DOUBLER, tracer=recorder)
+        for value in inputs:
+            c.add_input(value)
+            outputs, result = c.run(until_blocked=True)
+    return c
+
+
+class TestTraceRecorder:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "trace"
+        record(path, [3, -40, 0])
+        with TraceReader(str(path)) as reader:
+            assert not reader.has_pcs
+            assert reader.inputs() == [3, -40, 0]
+            assert reader.outputs() == [6, -80]
+            assert [e.value for e in reader if e.kind == EventKind.RUN_END] == [
+                RunResult.BLOCK_ON_INPUT.value,
+                RunResult.BLOCK_ON_INPUT.value,
+                RunResult.HALTED.value,
+            ]
+
+    def test_pcs(self, tmp_path):
+        path = tmp_path / "trace"
+        c = record(path, [5, 7, 0], pcs=True)
+        with TraceReader(str(path)) as reader:
+            pcs = list(reader.values(EventKind.PC))
+        # the input instruction is only recorded when it runs, not when it
+        # blocks
+        assert len(pcs) == c.instructions_executed
+        assert pcs[:6] == [0, 2, 5, 9, 11, 0]
+
+    def test_compact(self, tmp_path):
+        path = tmp_path / "trace"
+        record(path, list(range(1, 1000)) + [0], pcs=True)
+        with TraceReader(str(path)) as reader:
+            events = sum(1 for _ in reader)
+        assert path.stat().st_size < events * 1.1
+
+    def test_replay(self, tmp_path):
+        path = tmp_path / "trace"
+        record(path, [5, 7, 0], pcs=True)
+        assert replay(str(path), Computer(DOUBLER)) == ([10, 14], RunResult.HALTED)
+
+        # stops when the recorded inputs run out
+        record(path, [5, 7], pcs=True)
+        assert replay(str(path), Computer(DOUBLER)) == (
+            [10, 14],
+            RunResult.BLOCK_ON_INPUT,
+        )
+
+    def test_replay_diverges(self, tmp_path):
+        path = tmp_path / "trace"
+        record(path, [5, 7, 0], pcs=True)
+        tripler = list(DOUBLER)
+        tripler[7] = 3
+        with pytest.raises(TraceError):
+            replay(str(path), Computer(tripler), check_pcs=False)
+
+        # jumps straight to halting
+        received = []
+        c = Computer([1105, 1, 14] + DOUBLER[3:], output_fn=received.append)
+        with pytest.raises(TraceError):
+            replay(str(path), c)
+        # the computer's own hooks are put back
+        assert c.output_fn == received.append
+        assert c.input_fn is None and c.tracer is None
+
+    def test_not_a_trace(self, tmp_path):
+        path = tmp_path / "trace"
+        path.write_bytes(b"not a trace")
+        with pytest.raises(TraceError):
+            TraceReader(str(path))
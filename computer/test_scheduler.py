@@ -0,0 +1,51 @@
+from .computer import Computer
+from .example_programs import BUSY, ECHO
+from .scheduler import Scheduler
+
+
+class TestScheduler:
+    def test_chain(self):
+        s = Scheduler()
+        a = s.add(Computer(ECHO, inputs=[3, 2, 1, 0]))
+        b = s.add(Computer(ECHO))
+        s.connect(a, b)
+        s.run()
+        assert s.halted
+        assert s.outputs[b] == [3, 2, 1, 0]
+        assert a not in s.outputs
+
+    def test_blocked_computers_are_parked(self):
+        s = Scheduler()
+        c = s.add(Computer(ECHO))
+        s.run()
+        assert s.parked == {c}
+        assert s.slices == 1
+
+        # parked computers aren't run again until they get input
+        s.run()
+        assert s.slices == 1
+
+        s.send(c, 5)
+        assert s.wakeups == 1
+        s.run()
+        assert s.outputs[c] == [5]
+        assert s.parked == {c}
+
+        s.send(c, 0)
+        s.run()
+        assert s.halted
+
+    def test_time_slicing(self):
+        s = Scheduler(slice_size=100)
+        busy = s.add(Computer(BUSY))
+        quick = s.add(Computer(ECHO, inputs=[0]))
+        order = []
+        busy.output_fn = order.append
+        quick.output_fn = lambda v: order.append(2)
+        s.run()
+        assert order == [2, 1]
+        assert s.halted
+        assert s.instructions_executed == busy.instructions_executed + 4
+        # 10000 times round a loop of 2 instructions, then output and halt
+        assert busy.instructions_executed == 20002
+        assert s.slices == 201 + 1
@@ -0,0 +1,67 @@
+import pytest  # type: ignore
+
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult, parse_program
+from .image import ProgramImage
+from .specialize import Specializer, specialize
+
+# reads a, outputs it and moves the relative base by a, then outputs 10 * a + b
+# for each b read until a 0
+PROGRAM = (
+    parse_program(
+        "3,50,4,50,9,50,3,51,1006,51,24,1002,50,10,52,1,52,51,52,4,52,1105,1,6,99"
+    )
+    + [0] * 28
+)
+
+
+class TestSpecialize:
+    def test_specialize(self):
+        image = specialize(PROGRAM, [4])
+        assert image.outputs == (4,)
+        assert image.pos == 6
+        assert image.relative_base == 4
+        # the original program is untouched
+        assert PROGRAM[50] == 0
+
+        for cls in (Computer, CompiledComputer):
+            c = cls(image, inputs=[1, 2, 0])
+            assert c.relative_base == 4
+            assert c.run() == ([41, 42], RunResult.HALTED)
+        assert Computer(PROGRAM, inputs=[4, 1, 2, 0]).run()[0] == [4, 41, 42]
+
+    def test_halts_on_known_inputs(self):
+        with pytest.raises(ValueError):
+            specialize(parse_program("3,5,4,5,99,0"), [7])
+
+    def test_shared_memory(self):
+        pytest.importorskip("multiprocessing.shared_memory")
+        image = specialize(PROGRAM, [4])
+        shm = image.to_shared_memory()
+        try:
+            attached = ProgramImage.attach(shm.name)
+            assert (attached.pos, attached.relative_base) == (6, 4)
+            c = Computer(attached, inputs=[5, 0])
+            assert c.run() == ([45], RunResult.HALTED)
+            del c
+            attached.memory.pages.clear()
+            attached.shm.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class TestSpecializer:
+    def test_cached(self):
+        specializer = Specializer()
+        a = specializer.specialize(PROGRAM, [4])
+        assert specializer.specialize(PROGRAM, [4]) is a
+        assert specializer.specialize(PROGRAM, [5]) is not a
+        assert (specializer.hits, specializer.misses) == (1, 2)
+
+    def test_lru(self):
+        specializer = Specializer(maxsize=1)
+        a = specializer.specialize(PROGRAM, [4])
+        specializer.specialize(PROGRAM, [5])
+        assert specializer.specialize(PROGRAM, [4]) is not a
+        assert specializer.misses == 3
@@ -0,0 +1,111 @@
+import pytest  # type: ignore
+
+from .computer import Computer, RunResult, parse_program
+from .symbolic import (
+    Expr,
+    Symbol,
+    SymbolicComputer,
+    SymbolicError,
+    find_inputs,
+    solve,
+)
+
+NOUN = Symbol("noun", 0, 99)
+VERB = Symbol("verb", 0, 99)
+
+# like Day 2: [3] = m[noun] + m[verb], which is overwritten on the way to
+# [0] = 3 * noun + verb + 1
+GRAVITY = parse_program("1,0,0,3,1,1,1,3,1,3,1,3,1,3,2,3,1,3,21,0,99,1")
+
+# outputs 1 if the input is less than 10, otherwise 2 * input
+BRANCH = parse_program(
+    "3,30,1007,30,10,31,1005,31,16,1002,30,2,32,1105,1,20,1101,0,1,32,4,32,99"
+)
+
+
+def run(program, noun, verb):
+    program = list(program)
+    program[1:3] = [noun, verb]
+    c = Computer(program)
+    c.run()
+    return c.memory[0]
+
+
+class TestExpr:
+    def test_arithmetic(self):
+        x, y = Expr.of(NOUN), Expr.of(VERB)
+        e = (x + Expr.of(2)) * (y + Expr.of(-1))
+        assert str(e) == "noun*verb + -1*noun + 2*verb + -2"
+        assert e.evaluate({"noun": 3, "verb": 5}) == 20
+        assert e.linear_in(NOUN)
+        assert not (x * x).linear_in(NOUN)
+        assert (x + Expr.of(1) + Expr.of(-1)).value is None
+        assert (x + x * Expr.of(-1)).value == 0
+
+    def test_solve(self):
+        e = Expr.of(NOUN) * Expr.of(100) + Expr.of(VERB)
+        assert list(solve(e, 1202)) == [{"noun": 12, "verb": 2}]
+        assert list(solve(e, 100 * 100)) == []
+        # with a constraint that verb is 0
+        e = Expr.of(NOUN) + Expr.of(VERB)
+        assert list(solve(e, 5, [(Expr.of(VERB), False)])) == [{"noun": 5, "verb": 0}]
+
+
+class TestSymbolicComputer:
+    def test_linear_output(self):
+        (path,) = SymbolicComputer(GRAVITY, {1: NOUN, 2: VERB}).run()
+        assert path.result == RunResult.HALTED
+        assert path[0] == Expr.of(NOUN) * Expr.of(3) + Expr.of(VERB) + Expr.of(1)
+        assert path[0].evaluate({"noun": 12, "verb": 2}) == run(GRAVITY, 12, 2)
+
+        solution = find_inputs(GRAVITY, {1: NOUN, 2: VERB}, 0, 200)
+        assert solution is not None
+        assert run(GRAVITY, solution["noun"], solution["verb"]) == 200
+        assert find_inputs(GRAVITY, {1: NOUN, 2: VERB}, 0, 1000) is None
+
+    def test_branches(self):
+        x = Symbol("x", -50, 50)
+        paths = SymbolicComputer(BRANCH, inputs=[x]).run()
+        assert [p.result for p in paths] == [RunResult.HALTED] * 2
+        for path in paths:
+            (output,) = path.outputs
+            for assignment in path.solve(output, 1):
+                assert assignment["x"] < 10
+        solutions = [a for p in paths for a in p.solve(p.outputs[0], 40)]
+        assert solutions == [{"x": 20}]
+
+    def test_max_paths(self):
+        # branches on the input twice
+        program = parse_program("3,20,1006,20,10,1005,20,10,99,0,99")
+        x = Symbol("x", 0, 9)
+        paths = SymbolicComputer(program, inputs=[x]).run(max_paths=2)
+        assert [p.result for p in paths] == [RunResult.HALTED, RunResult.RUNNABLE]
+        # the path which reached the second branch was kept, unsplit
+        assert paths[1].stopped_at == paths[1].pos == 5
+        assert paths[1].instructions_executed == 2
+
+    def test_counts_instructions_like_computer(self):
+        (path,) = SymbolicComputer(GRAVITY, {1: NOUN, 2: VERB}).run()
+        c = Computer(GRAVITY)
+        c.run()
+        assert path.instructions_executed == c.instructions_executed
+
+    def test_blocks_on_input(self):
+        (path,) = SymbolicComputer(BRANCH).run()
+        assert path.result == RunResult.BLOCK_ON_INPUT
+        assert path.pos == 0
+
+    def test_unknown_memory(self):
+        # writes m[noun] to 0
+        program = parse_program("1,0,5,0,99,0")
+        (path,) = SymbolicComputer(program, {1: NOUN}).run()
+        with pytest.raises(SymbolicError):
+            list(path.solve(path[0], 1))
+
+    def test_symbolic_jump_target(self):
+        with pytest.raises(SymbolicError):
+            SymbolicComputer(parse_program("1105,1,0"), {2: NOUN}).run()
+
+    def test_symbolic_jump_target_not_taken(self):
+        (path,) = SymbolicComputer(parse_program("1106,1,0,99"), {2: NOUN}).run()
+        assert path.result == RunResult.HALTED
@@ -0,0 +1,70 @@
+import logging
+
+from .compiler import CompiledComputer
+from .computer import Computer, RunResult, parse_program
+from .tracing import LoggingTracer, Tracer
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def on_instruction(self, computer, pos, instruction):
+        self.events.append(("instruction", pos, instruction.opcode))
+
+    def on_read(self, computer, addr, value):
+        self.events.append(("read", addr, value))
+
+    def on_write(self, computer, addr, old_value, value):
+        self.events.append(("write", addr, old_value, value))
+
+    def on_input(self, computer, value):
+        self.events.append(("input", value))
+
+    def on_output(self, computer, value):
+        self.events.append(("output", value))
+
+
+class TestTracer:
+    def test_events(self):
+        # read input into addr 12, double it, jump over nothing and output it
+        program = parse_program("3,12,1002,12,2,12,1006,12,9,4,12,99,0")
+        tracer = RecordingTracer()
+        outputs, result = Computer(program, inputs=[21], tracer=tracer).run()
+
+        assert outputs == [42]
+        assert tracer.events == [
+            ("instruction", 0, 3),
+            ("input", 21),
+            ("write", 12, 0, 21),
+            ("instruction", 2, 2),
+            ("read", 12, 21),
+            ("write", 12, 21, 42),
+            ("instruction", 6, 6),
+            # jump not taken, so its target isn't read
+            ("read", 12, 42),
+            ("instruction", 9, 4),
+            ("read", 12, 42),
+            ("output", 42),
+            ("instruction", 11, 99),
+        ]
+
+    def test_blocked_input_is_not_reported(self):
+        tracer = RecordingTracer()
+        c = Computer([3, 0, 99], tracer=tracer)
+        assert c.run(until_blocked=True) == ([], RunResult.BLOCK_ON_INPUT)
+        assert tracer.events == [("instruction", 0, 3)]
+
+    def test_compiled_computer_is_traced(self):
+        program = parse_program("1101,2,3,7,4,7,99,0")
+        tracer = RecordingTracer()
+        outputs, result = CompiledComputer(program, tracer=tracer).run()
+        assert outputs == [5]
+        assert ("instruction", 0, 1) in tracer.events
+        assert ("write", 7, 0, 5) in tracer.events
+
+    def test_logging_tracer(self, caplog):
+        program = parse_program("104,1125899906842624,99")
+        with caplog.at_level(logging.DEBUG):
+            Computer(program, tracer=LoggingTracer()).run()
+        assert "store_output: outputting: 1125899906842624" in caplog.text
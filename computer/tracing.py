@@ -0,0 +1,76 @@
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from .computer import OP_NAMES, Instruction
+
+if TYPE_CHECKING:
+    from .computer import Computer, RunResult
+
+
+class Tracer:
+    """
+    Receives events from a running Computer. Attach one by passing
+    tracer=... to the Computer, or by setting computer.tracer before calling
+    run(). Without a tracer, the computer runs without any tracing code in its
+    loop.
+
+    Every event does nothing by default; override the ones you need.
+    """
+
+    def on_run_start(self, computer: "Computer"):
+        """Called when run() is entered."""
+
+    def on_run_end(self, computer: "Computer", result: "RunResult"):
+        """Called when run() returns result."""
+
+    def on_instruction(self, computer: "Computer", pos: int, instruction: Instruction):
+        """Called before running the instruction at address pos."""
+
+    def on_read(self, computer: "Computer", addr: int, value: int):
+        """Called when an instruction reads a parameter from memory."""
+
+    def on_write(self, computer: "Computer", addr: int, old_value: int, value: int):
+        """Called after an instruction writes value to memory at addr."""
+
+    def on_input(self, computer: "Computer", value: int):
+        """Called after an instruction consumes value from the input queue."""
+
+    def on_output(self, computer: "Computer", value: int):
+        """Called after an instruction outputs value."""
+
+
+class LoggingTracer(Tracer):
+    """Logs every event, giving a full instruction trace of the run."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def on_instruction(self, computer, pos, instruction):
+        self.logger.log(
+            self.level,
+            "run: at position=%d op=%s param_modes=%s params=%s relative_base=%d",
+            pos,
+            OP_NAMES[instruction.opcode],
+            [mode.name for mode in instruction.param_modes],
+            instruction.params,
+            computer.relative_base,
+        )
+
+    def on_read(self, computer, addr, value):
+        self.logger.log(self.level, "read: reading address=%d, value=%d", addr, value)
+
+    def on_write(self, computer, addr, old_value, value):
+        self.logger.log(
+            self.level,
+            "write: writing address=%d, value=%d (was %d)",
+            addr,
+            value,
+            old_value,
+        )
+
+    def on_input(self, computer, value):
+        self.logger.log(self.level, "read_input: input is %d", value)
+
+    def on_output(self, computer, value):
+        self.logger.log(self.level, "store_output: outputting: %d", value)
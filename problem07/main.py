@@ -1,19 +1,33 @@
 from itertools import permutations
 
-from computer import Computer
+from computer import Computer, ComputerPool, ProgramImage, Scheduler, Specializer
+from computer.batch import BatchComputer
 
 
 def find_max_thruster(program, feedback_mode=False):
     if feedback_mode:
-        possible_phase_settings = permutations([5, 6, 7, 8, 9], 5)
+        possible_phase_settings = list(permutations([5, 6, 7, 8, 9], 5))
     else:
-        possible_phase_settings = permutations([0, 1, 2, 3, 4], 5)
+        possible_phase_settings = list(permutations([0, 1, 2, 3, 4], 5))
 
     max_val = 0
     max_phase_setting = None
 
-    for phase_setting in possible_phase_settings:
-        val = run_amplifiers(5, phase_setting, program, feedback_mode)
+    if feedback_mode:
+        # each amplifier is taken from a pool of computers which start from
+        # the image the specializer made of the program run on its phase
+        image = ProgramImage(program)
+        specializer = Specializer()
+        pools = {}
+        vals = [
+            run_amplifiers(5, phase_setting, image, feedback_mode, pools, specializer)
+            for phase_setting in possible_phase_settings
+        ]
+    else:
+        # every phase setting at once, one amplifier at a time
+        vals = run_amplifiers_batch(5, possible_phase_settings, program)
+
+    for phase_setting, val in zip(possible_phase_settings, vals):
         if val > max_val:
             max_val = val
             max_phase_setting = phase_setting
@@ -21,47 +35,84 @@ def find_max_thruster(program, feedback_mode=False):
     return max_val, max_phase_setting
 
 
-def run_amplifiers(count, phase_settings, opcodes, feedback_mode=False):
+def run_amplifiers(
+    count,
+    phase_settings,
+    opcodes,
+    feedback_mode=False,
+    pools=None,
+    specializer=None,
+):
     assert count == len(phase_settings)
 
+    def amplifier(phase, inputs):
+        if pools is None:
+            return Computer(opcodes, [phase] + inputs)
+        if phase not in pools:
+            pools[phase] = ComputerPool(specializer.specialize(opcodes, [phase]))
+        return pools[phase].acquire(inputs)
+
+    def release(phase, c):
+        if pools is not None:
+            pools[phase].release(c)
+
     if feedback_mode == True:
-        # setup each computer
+        # setup each computer, with its outputs wired to the next one's inputs
+        scheduler = Scheduler()
         computers = []
         for n in range(count):
-            phase = phase_settings[n]
-            inputs = [phase]
-            if n == 0:
-                inputs.append(0)
-            c = Computer(opcodes, inputs)
+            c = scheduler.add(amplifier(phase_settings[n], [0] if n == 0 else []))
             computers.append(c)
 
+        for ix, c in enumerate(computers[:-1]):
+            scheduler.connect(c, computers[ix + 1])
+
+        thruster_signals = []
+
+        def to_thrusters(output):
+            thruster_signals.append(output)
+            scheduler.send(computers[0], output)
+
+        computers[-1].output_fn = to_thrusters
+
         # then run them
-        while True:
-            for ix, c in enumerate(computers):
-                outputs, result = c.run(until_blocked=True)
-                # pass output to next computer
-                next_computer = (
-                    computers[ix + 1] if ix != len(computers) - 1 else computers[0]
-                )
-                for output in outputs:
-                    next_computer.add_input(output)
-                last_output = outputs
-
-            if all((c.halted for c in computers)):
-                last_output = computers[-1].output
-                assert len(last_output) == 1
-                return last_output[0]
+        scheduler.run()
+        assert scheduler.halted
+
+        for phase, c in zip(phase_settings, computers):
+            release(phase, c)
+        return thruster_signals[-1]
     else:
         output_from_last = 0
 
         for n in range(count):
-            phase = phase_settings[n]
-            inputs = [phase, output_from_last]
-            c = Computer(opcodes, inputs)
+            c = amplifier(phase_settings[n], [output_from_last])
             outputs, result = c.run()
             assert (
                 len(outputs) == 1
             ), f"Expected output length of 1 but got {len(outputs)}"
             output_from_last = outputs[0]
+            release(phase_settings[n], c)
 
         return output_from_last
+
+
+def run_amplifiers_batch(count, all_phase_settings, opcodes):
+    """
+    Runs the amplifiers (not in feedback mode) for many phase settings at
+    once, returning the output of the last amplifier for each.
+    """
+    output_from_last = [0] * len(all_phase_settings)
+
+    for n in range(count):
+        inputs = [
+            [phases[n], output]
+            for phases, output in zip(all_phase_settings, output_from_last)
+        ]
+        outputs, status = BatchComputer(opcodes, inputs).run()
+        assert all(
+            len(o) == 1 for o in outputs
+        ), "Expected every amplifier to output 1 value"
+        output_from_last = [o[0] for o in outputs]
+
+    return output_from_last
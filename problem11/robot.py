@@ -1,4 +1,5 @@
 import computer
+from computer.frames import FrameDecoder
 import enum
 
 
@@ -25,7 +26,7 @@ TURN_RIGHT = 1
 
 
 class HullPaintingRobot:
-    def __init__(self, program, starting_color=PAINT_BLACK):
+    def __init__(self, program, starting_color=PAINT_BLACK, tracer=None):
         self.direction = Direction.UP
         self.current_pos = (0, 0)
         self.panel_colors = {self.current_pos: starting_color}
@@ -34,27 +35,24 @@ class HullPaintingRobot:
         # that dict because we were keeping track of the starting color, OR if
         # it was painted.
         self.painted_panels = set()
-        self.computer = computer.Computer(program, inputs=[])
+        # outputs come in (color, turn) pairs
+        self.receive_output = FrameDecoder(2, self.paint_and_move)
+        # a computer.recorder.TraceRecorder here records the run for replay
+        self.computer = computer.Computer(
+            program,
+            tracer=tracer,
+            input_fn=self.current_color,
+            output_fn=self.receive_output,
+        )
 
     def run(self):
-        result = None
-        while result != computer.RunResult.HALTED:
-            result = self.run_one_iteration()
+        """Runs the whole painting program in one go."""
+        outputs, result = self.computer.run()
+        assert result == computer.RunResult.HALTED
 
-    def run_one_iteration(self):
-        # check color of current position
-        current_panel_color = self.panel_colors.get(self.current_pos, PAINT_BLACK)
-
-        self.computer.add_input(current_panel_color)
-        output, result = self.computer.run(until_blocked=True)
-
-        assert len(output) == 2
-        color, turn = output
-
-        if result != computer.RunResult.HALTED:
-            self.paint_and_move(color, turn)
-
-        return result
+    def current_color(self) -> int:
+        """The camera: reports the color of the panel the robot is over."""
+        return self.panel_colors.get(self.current_pos, PAINT_BLACK)
 
     def paint_and_move(self, color, turn):
         assert color == PAINT_BLACK or color == PAINT_WHITE
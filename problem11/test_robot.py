@@ -66,3 +66,12 @@ class TestRobot:
         assert robot.current_pos == (0, 1)
 
         assert len(robot.painted_panels) == 6
+
+    def test_run(self):
+        # twice: read the panel color, paint it white and turn left
+        program = [3, 100, 104, 1, 104, 0, 3, 100, 104, 1, 104, 0, 99]
+        robot = HullPaintingRobot(program)
+        robot.run()
+        assert robot.painted_panels == {(0, 0), (-1, 0)}
+        assert robot.direction == Direction.DOWN
+        assert robot.current_pos == (-1, -1)
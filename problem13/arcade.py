@@ -1,7 +1,8 @@
 from collections import defaultdict
-from typing import Dict
+from typing import Dict, Optional
 
-from computer import Computer, RunResult
+from computer import CompiledComputer, ProgramImage, ResultCache, RunResult
+from computer.frames import FrameDecoder, frames
 
 from enum import Enum
 import time
@@ -29,18 +30,25 @@ chars = {
 
 
 class Arcade:
-    def __init__(self, program):
-        self.program = program
+    def __init__(self, program, cache: Optional[ResultCache] = None):
+        # shared by the computer of every game played
+        self.program = ProgramImage(program)
+        # if given, play_once() reuses the outputs of earlier identical games
+        self.cache = cache
         self.reset_screen()
 
     def reset_screen(self):
         self.screen: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        # draws tiles one output at a time, as (x, y, tile) triples arrive
+        self.receive_output = FrameDecoder(3, self.draw_tile)
 
     def update_screen(self, outputs):
-        for n in range(0, len(outputs), 3):
-            x, y, tile = outputs[n], outputs[n + 1], outputs[n + 2]
+        for x, y, tile in frames(outputs, 3):
             self.screen[x][y] = tile
 
+    def draw_tile(self, x: int, y: int, tile: int):
+        self.screen[x][y] = tile
+
     def find_tile(self, value):
         for x in self.screen:
             for y in self.screen[x]:
@@ -59,11 +67,14 @@ class Arcade:
     def play_once(self):
         self.reset_screen()
 
-        self.computer = Computer(self.program, max_memory_length=10000)
-
-        outputs, result = self.computer.run()
+        if self.cache is not None:
+            outputs, result, _ = self.cache.run(
+                self.program, computer_class=CompiledComputer
+            )
+        else:
+            self.computer = CompiledComputer(self.program)
+            outputs, result = self.computer.run()
         assert result == RunResult.HALTED
-        assert len(outputs) % 3 == 0
 
         self.update_screen(outputs)
 
@@ -79,28 +90,24 @@ class Arcade:
         """
         self.reset_screen()
 
-        p = list(self.program)
-        p[0] = 2
-        self.computer = Computer(p, max_memory_length=10000)
-
-        result = None
-        while result != RunResult.HALTED:
-            outputs, result = self.computer.run(until_blocked=True)
-            self.update_screen(outputs)
+        def joystick() -> int:
             if print_board:
                 self.print_screen()
+                print(f"Score is {self.screen[-1][0]}")
+            if sleep:
+                time.sleep(sleep)
+            return self.determine_paddle_move().value
+
+        self.computer = CompiledComputer(
+            self.program, input_fn=joystick, output_fn=self.receive_output
+        )
+        self.computer.write(2, 0)
 
-            score = self.screen[-1][0]
-            if result == RunResult.BLOCK_ON_INPUT:
-                # x = input(f"Score is {score}. Enter to continue")
-                if print_board:
-                    print(f"Score is {score}")
-                if sleep:
-                    time.sleep(sleep)
-                move = self.determine_paddle_move()
-                self.computer.add_input(move.value)
-            elif result == RunResult.HALTED:
-                print(f"Score is {score}. Game over")
+        outputs, result = self.computer.run()
+        assert result == RunResult.HALTED
+        if print_board:
+            self.print_screen()
+        print(f"Score is {self.screen[-1][0]}. Game over")
 
     def determine_paddle_move(self):
         ball = self.find_tile(TILE_BALL)
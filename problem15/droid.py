@@ -1,5 +1,5 @@
-from collections import Counter
-from typing import Dict, Tuple, Optional, Iterator, List, Set, Union
+from collections import Counter, deque
+from typing import Deque, Dict, Tuple, Optional, Iterator, List, Set, Union
 from enum import Enum, unique
 from computer import Computer, RunResult
 import time
@@ -21,21 +21,6 @@ class Direction(Enum):
     WEST = 3
     EAST = 4
 
-    def opposite(self):
-        if self == Direction.NORTH:
-            return Direction.SOUTH
-
-        if self == Direction.SOUTH:
-            return Direction.NORTH
-
-        if self == Direction.EAST:
-            return Direction.WEST
-
-        if self == Direction.WEST:
-            return Direction.EAST
-
-        raise ValueError
-
     @staticmethod
     def from_str(s: str) -> "Direction":
         if s == "N":
@@ -89,15 +74,24 @@ ShipMap = Dict[Position, Tile]
 
 
 class RepairDroid:
-    def __init__(self, program):
+    def __init__(self, program, tracer=None):
+        # a computer.recorder.TraceRecorder here records the droid's moves for
+        # replay. The probes of explore_entire_map() aren't recorded.
         self.computer = Computer(
-            program, initial_memory_size=2000, max_memory_length=10000
+            program,
+            tracer=tracer,
+            input_fn=self.next_move,
+            output_fn=self.receive_status,
         )
+        # the movement commands to send, as the program asks for them
+        self.moves: Iterator[Direction] = iter(())
         self.ship_map: ShipMap = {}
 
         # the robot's initial position is traversable by definition
         self.pos = Position(0, 0)
         self.ship_map[self.pos] = Tile.TRAVERSABLE
+        # where the last move sent would take the droid
+        self.intended = self.pos
 
         self.oxygen_station_pos = None
 
@@ -122,21 +116,28 @@ class RepairDroid:
     def count_tiles(self) -> Dict[str, int]:
         return dict(Counter(tile.name for tile in self.ship_map.values()))
 
-    def move_once(self, direction: Direction):
-        self.computer.add_input(direction.value)
+    def next_move(self) -> Optional[int]:
+        move = next(self.moves, None)
+        if move is None:
+            return None
+        self.intended = self.pos + move
+        return move.value
 
-        # start = time.monotonic()
+    def move_once(self, direction: Direction):
+        self.moves = iter([direction])
         outputs, result = self.computer.run(until_blocked=True)
-        # elapsed = time.monotonic() - start
-        # print(f"Computer run took {elapsed} seconds")
-
-        self.moves_attempted += 1
 
         assert (
             result == RunResult.BLOCK_ON_INPUT
         ), f"result was unexpected {result}. outputs: {outputs}"
-        assert len(outputs) == 1
-        output = outputs[0]
+
+    def receive_status(self, output: int):
+        if self.record_status(self.intended, output):
+            self.pos = self.intended
+
+    def record_status(self, intended: Position, output: int) -> bool:
+        """Maps the status of a move into intended. Returns whether the droid moved."""
+        self.moves_attempted += 1
 
         # The repair droid can reply with any of the following status codes:
         #
@@ -146,21 +147,19 @@ class RepairDroid:
         #   its new position is the location of the oxygen system.
         assert output in [0, 1, 2]
 
-        intended = self.pos + direction
-
         if output == 0:
             self.ship_map[intended] = Tile.WALL
+            return False
 
         if output == 1:
             self.ship_map[intended] = Tile.TRAVERSABLE
-            self.pos = intended
-            self.moves_made += 1
 
         if output == 2:
             self.ship_map[intended] = Tile.OXYGEN_STATION
-            self.pos = intended
             self.oxygen_station_pos = intended
-            self.moves_made += 1
+
+        self.moves_made += 1
+        return True
 
     def print_screen(self):
         min_x, max_x, min_y, max_y = 0, 0, 0, 0
@@ -196,12 +195,12 @@ class RepairDroid:
         assert start in self.ship_map
         assert self.ship_map[start] in [Tile.TRAVERSABLE, Tile.OXYGEN_STATION]
 
-        queue: List[Position] = [start]
+        queue: Deque[Position] = deque([start])
         visited: Set[Position] = set()
         dist = {start: 0}
 
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             visited.add(node)
             for d in Direction:
                 neighbor = node + d
@@ -216,16 +215,25 @@ class RepairDroid:
         return dist
 
     def explore_entire_map(self):
-        # dfs
-        def dfs(p: Position):
+        # bfs over the states of the droid's program. Each position reached
+        # keeps a fork of the computer standing there, and each unknown
+        # neighbor is probed by a fork of that, so the droid never has to walk
+        # back the way it came.
+        start = self.computer.fork()
+        start.input_fn = start.output_fn = start.tracer = None
+        queue: Deque[Tuple[Position, Computer]] = deque([(self.pos, start)])
+
+        while queue:
+            p, computer = queue.popleft()
             for d in Direction:
                 next_p = p + d
-                if next_p not in self.ship_map:
-                    # print(f'at {p}, moving to {d}')
-                    self.move_once(d)
-                    # did we actually move?
-                    if self.pos == next_p:
-                        dfs(next_p)
-                        self.move_once(d.opposite())
-
-        dfs(self.pos)
+                if next_p in self.ship_map:
+                    continue
+
+                probe = computer.fork()
+                probe.add_input(d.value)
+                outputs, result = probe.run(until_blocked=True)
+                assert result == RunResult.BLOCK_ON_INPUT and len(outputs) == 1
+
+                if self.record_status(next_p, outputs[0]):
+                    queue.append((next_p, probe))